@@ -33,7 +33,7 @@ class PreSeasonSandbaggingAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_pre_season_improvements(self.season)
+        self.df = self.get_dataset(get_pre_season_improvements, self.season)
         self.df.sort_values("LapTimeImprovement", ascending=True, inplace=True)
         self.df = self.df.groupby(self.grouped_by, sort=False)
 
@@ -83,7 +83,7 @@ class Q1SessionImprovement(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_Q1_improvements(self.season)
+        self.df = self.get_dataset(get_Q1_improvements, self.season)
         print(self.df.sort_values("Driver").to_string())
         self.df["MedianImprovement"] = self.df.groupby(self.grouped_by)[
             "Improvement"
@@ -117,6 +117,8 @@ class TimeOnTrackPattern(Aggregation):
 
 
 class SpinsAnalysis(Aggregation):
+    datasets = [get_all_race_control_messages]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -149,7 +151,7 @@ class SpinsAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_race_control_messages(self.season)
+        self.df = self.get_dataset(get_all_race_control_messages, self.season)
 
         self.df.fillna(value=np.nan, inplace=True)
 
@@ -266,6 +268,8 @@ class BrakingPointAnalysis(Aggregation):
 
 
 class DownshiftRateAnalyis(Aggregation):
+    datasets = [get_downshift_rates]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -299,7 +303,7 @@ class DownshiftRateAnalyis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_downshift_rates(self.season)
+        self.df = self.get_dataset(get_downshift_rates, self.season)
         self.df[self.sorting_order] = self.df.groupby(self.grouped_by)[
             self.metric_column
         ].transform(self.sorting_order)
@@ -396,6 +400,8 @@ class DownshiftRateAnalyis(Aggregation):
 
 
 class SlowPitStopsAnalysis(Aggregation):
+    datasets = [get_all_pitstop_times, get_all_race_control_messages]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -430,8 +436,10 @@ class SlowPitStopsAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_pitstop_times(self.season)
-        season_race_control_messages = get_all_race_control_messages(self.season)
+        self.df = self.get_dataset(get_all_pitstop_times, self.season)
+        season_race_control_messages = self.get_dataset(
+            get_all_race_control_messages, self.season
+        )
         # print(season_race_control_messages[season_race_control_messages["Message"].str.contains("PENALTY")])
         penalty_messages = season_race_control_messages[
             season_race_control_messages["Message"].str.contains("PENALTY")
@@ -570,6 +578,8 @@ class SlowPitStopsAnalysis(Aggregation):
 
 
 class BestPitStopTimesAnalysis(Aggregation):
+    datasets = [get_all_pitstop_times]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -604,7 +614,7 @@ class BestPitStopTimesAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_pitstop_times(self.season)
+        self.df = self.get_dataset(get_all_pitstop_times, self.season)
 
         self.sorting_column_name = (
             f"{self.sorting_order.capitalize()}{self.metric_column.capitalize()}"
@@ -670,6 +680,8 @@ class BestPitStopTimesAnalysis(Aggregation):
 
 
 class TimeInPitlaneAnalysis(Aggregation):
+    datasets = [get_all_pitstop_laps]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -703,7 +715,7 @@ class TimeInPitlaneAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_pitstop_laps(self.season)
+        self.df = self.get_dataset(get_all_pitstop_laps, self.season)
         self.df = self.df[self.df["Meeting"] != "Monaco Grand Prix"]
         self.sorting_column_name = (
             f"{self.sorting_order.capitalize()}{self.metric_column.capitalize()}"
@@ -750,6 +762,8 @@ class TimeInPitlaneAnalysis(Aggregation):
 
 
 class DRSActivationAnalysis(Aggregation):
+    datasets = [get_DRS_activations]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(
@@ -789,7 +803,7 @@ class DRSActivationAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_DRS_activations(self.season)
+        self.df = self.get_dataset(get_DRS_activations, self.season)
         self.df["TotalDRSActivations"] = self.df.groupby(self.grouped_by, sort=False)[
             "AmountDRSActivations"
         ].transform(sum)
@@ -846,6 +860,8 @@ class DRSActivationAnalysis(Aggregation):
 
 
 class RPMDistributionAnalysis(Aggregation):
+    datasets = [get_all_engine_data]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -880,7 +896,9 @@ class RPMDistributionAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_engine_data(self.season)
+        self.df = self.get_dataset(
+            get_all_engine_data, self.season, columns=["Driver", "Team", "RPM"]
+        )
         self.df[self.sorting_order] = self.df.groupby(self.grouped_by)["RPM"].transform(
             self.sorting_order
         )
@@ -982,27 +1000,18 @@ class SectionTimesAnalysis(Aggregation):
         )
 
     def prepare_data(self, meeting, selected_session, turns):
-        self.df = get_section_times(self.season)
-        print(self.df)
-        # self.df = self.df[
-        # (self.df["Meeting"] == meeting) & (self.df["Session"] == selected_session)
-        # ]
-        print(self.df)
-        self.df = self.df[
-            self.df["SectionName"]
-            .str.slice(start=1)
-            .isin([str(turn) for turn in turns])
-        ]
-        groupers = (
-            ["Driver", "LapNumber"]
-            if self.grouped_by == "Driver"
-            else ["Driver", "LapNumber"]
+        laps, section_times, section_names = get_session_section_times(
+            get_session(self.season, meeting, selected_session)
+        )
+        in_turns = np.array(
+            [section_name[1:] in [str(turn) for turn in turns] for section_name in section_names],
+            dtype=bool,
         )
         self.df = (
-            self.df.groupby(groupers)
-            .agg(dict(Time="sum"))
-            .reset_index()
+            laps[["Driver", "LapNumber"]]
+            .assign(Time=section_times[:, in_turns].sum(axis=1))
             .sort_values("Time", ascending=True)
+            .reset_index(drop=True)
         )
         self.df["Team"] = self.df["Driver"].apply(
             lambda val: get_team(self.season, val)
@@ -1024,6 +1033,8 @@ class SectionTimesAnalysis(Aggregation):
 
 
 class UpshiftRPMAnalyis(Aggregation):
+    datasets = [get_all_upshifts]
+
     def __init__(self, season, grouped_by, session_selection):
         self.grouped_by = grouped_by
         self.session_selection = session_selection
@@ -1056,7 +1067,7 @@ class UpshiftRPMAnalyis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_upshifts(self.season)
+        self.df = self.get_dataset(get_all_upshifts, self.season)
         self.df["MedianUpshiftRPM"] = self.df.groupby(self.grouped_by)["RPM"].transform(
             "median"
         )
@@ -1085,6 +1096,8 @@ class UpshiftRPMAnalyis(Aggregation):
 
 
 class SingleRaceUpshiftRPMAnalyis(Aggregation):
+    datasets = [get_all_upshifts]
+
     def __init__(self, season, grouped_by, selected_race):
         self.grouped_by = grouped_by
         self.selected_race = selected_race
@@ -1117,7 +1130,7 @@ class SingleRaceUpshiftRPMAnalyis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_upshifts(self.season, self.selected_race)
+        self.df = self.get_dataset(get_all_upshifts, self.season)
         self.df = self.df[self.df["Meeting"] == self.selected_race]
         self.df["MedianUpshiftRPM"] = self.df.groupby(self.grouped_by)["RPM"].transform(
             "median"
@@ -1181,7 +1194,7 @@ class StintPaceAnalysis(Aggregation):
 
     def prepare_data(self):
         session = get_session(2022, self.selected_meeting, self.selected_session)
-        self.df = session.laps
+        self.df = session.laps.copy()
 
         self.df["Day"] = (
             self.df["LapStartDate"]
@@ -1385,6 +1398,8 @@ class SpeedTrapAnalysis(Aggregation):
 
 
 class LaunchTimesAnalysis(Aggregation):
+    datasets = [get_all_launches]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -1416,7 +1431,7 @@ class LaunchTimesAnalysis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_launches(self.season)
+        self.df = self.get_dataset(get_all_launches, self.season)
         self.df["MedianTime"] = self.df.groupby(self.grouped_by)["Time"].transform(
             "median"
         )
@@ -1445,6 +1460,8 @@ class LaunchTimesAnalysis(Aggregation):
 
 
 class LaunchRPMAnalyis(Aggregation):
+    datasets = [get_all_launches]
+
     def __init__(self, season, grouped_by):
         self.grouped_by = grouped_by
         self.color_getter = dict(Driver=get_driver_color, Team=get_team_color)[
@@ -1476,7 +1493,7 @@ class LaunchRPMAnalyis(Aggregation):
         )
 
     def prepare_data(self):
-        self.df = get_all_launches(self.season)
+        self.df = self.get_dataset(get_all_launches, self.season)
         self.df["MedianLaunchRPM"] = self.df.groupby(self.grouped_by)["RPM"].transform(
             "median"
         )
@@ -1542,7 +1559,7 @@ class PowerOutputAnalysis(Aggregation):
             #         np.gradient(lap.telemetry["Speed"]), window_length=149, polyorder=1
             #     )
             lap.telemetry["Acceleration"] = (
-                savgol_filter(
+                signal.savgol_filter(
                     np.gradient(lap.telemetry["Speed"])
                     / np.gradient(lap.telemetry["TimeInSeconds"]),
                     window_length=299,
@@ -1,5 +1,126 @@
+import sys
+import argparse
+from concurrent.futures import as_completed
 from aggregations import *
 from views import *
 
-def run():
-    pass
+try:
+    import yaml
+except ImportError:  # job specs can still be given as JSON
+    yaml = None
+
+
+def load_job_spec(path):
+    # either a list of jobs or {"defaults": {...}, "jobs": [...]}, where every job names an
+    # Aggregation and gives its arguments, e.g. {"aggregation": "SpinsAnalysis", "season": 2021, "grouped_by": "Driver"}
+    with open(path) as f:
+        if os.path.splitext(path)[1] in [".yaml", ".yml"]:
+            if yaml is None:
+                raise SystemExit("YAML job specs require PyYAML, use a JSON job spec instead")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if isinstance(spec, list):
+        spec = dict(jobs=spec)
+    jobs = [spec.get("defaults", dict()) | job for job in spec["jobs"]]
+    for job in jobs:
+        aggregation = globals().get(job.get("aggregation"))
+        if not (isinstance(aggregation, type) and issubclass(aggregation, Aggregation)):
+            raise SystemExit(f"""Unknown aggregation {job.get("aggregation")}""")
+        parameters = list(inspect.signature(aggregation.__init__).parameters.values())[1:]
+        missing = [
+            parameter.name
+            for parameter in parameters
+            if parameter.default is inspect.Parameter.empty and parameter.name not in job
+        ]
+        if missing:
+            raise SystemExit(f"""{job["aggregation"]} job is missing {", ".join(missing)}""")
+    return jobs
+
+
+def get_job_datasets(job):
+    # the cached season getters the job's aggregation declares it reads, as (getter name, season)
+    return [
+        (getter.__name__, job["season"]) for getter in globals()[job["aggregation"]].datasets
+    ]
+
+
+def build_dataset(getter_name, season):
+    cached_getters[getter_name](season)
+
+
+def render_job(job):
+    # the job's "export" setting picks the targets its chart is exported as, see EXPORT_PROFILES
+    Aggregation.export_targets = get_export_targets(job.get("export", ["full"]))
+    arguments = {
+        key: value for key, value in job.items() if key not in ["aggregation", "export"]
+    }
+    globals()[job["aggregation"]](**arguments)
+
+
+def describe_job(job):
+    return ", ".join(f"{key}={value}" for key, value in job.items())
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render the aggregations listed in a JSON or YAML job spec"
+    )
+    parser.add_argument("job_spec")
+    parser.add_argument("--workers", type=int, default=SESSION_LOADER_WORKERS)
+    arguments = parser.parse_args(argv)
+
+    plt.switch_backend("Agg")
+    preload_images()
+    jobs = load_job_spec(arguments.job_spec)
+    job_datasets = [get_job_datasets(job) for job in jobs]
+    datasets = list(dict.fromkeys(dataset for datasets in job_datasets for dataset in datasets))
+    print(len(jobs), "jobs reading", len(datasets), "datasets")
+
+    # every dataset is built once before the charts are rendered, so no two workers build the same
+    # one; each worker then reads only the columns and meetings its aggregations ask for into its
+    # own dataset registry, rather than the parent holding every full dataset for the forks to share.
+    # Datasets kept in the warehouse only have the rounds completed since the last run ingested,
+    # one task per season so the datasets of a round share its loaded sessions
+    failures = []
+    failed_datasets = set()
+    ingesting = dict()
+    for getter_name, season in datasets:
+        if getter_name in WAREHOUSE_GETTERS:
+            ingesting.setdefault(season, []).append(getter_name)
+    with ProcessPoolExecutor(max_workers=arguments.workers) as executor:
+        building = {
+            executor.submit(build_dataset, *dataset): [dataset]
+            for dataset in datasets
+            if dataset[0] not in WAREHOUSE_GETTERS
+        }
+        for season, getter_names in ingesting.items():
+            dataset_names = [WAREHOUSE_GETTERS[getter_name] for getter_name in getter_names]
+            future = executor.submit(ingest_season, season, dataset_names)
+            building[future] = [(getter_name, season) for getter_name in getter_names]
+        for future in as_completed(building):
+            if future.exception() is not None:
+                for dataset in building[future]:
+                    print("FAILED BUILDING DATASET", *dataset, future.exception())
+                    failed_datasets.add(dataset)
+
+    renderable = []
+    for job, datasets in zip(jobs, job_datasets):
+        if any(dataset in failed_datasets for dataset in datasets):
+            print("SKIPPED", describe_job(job))
+            failures.append(job)
+        else:
+            renderable.append(job)
+
+    with ProcessPoolExecutor(max_workers=arguments.workers) as executor:
+        rendering = {executor.submit(render_job, job): job for job in renderable}
+        for future in as_completed(rendering):
+            if future.exception() is None:
+                print("RENDERED", describe_job(rendering[future]))
+            else:
+                print("FAILED RENDERING", describe_job(rendering[future]), future.exception())
+                failures.append(rendering[future])
+
+    print(len(jobs) - len(failures), "of", len(jobs), "jobs rendered")
+    if failures:
+        sys.exit(1)
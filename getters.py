@@ -3,96 +3,418 @@ import math
 import pandas as pd
 import numpy as np
 import functools
-import fastf1
-import requests
+import hashlib
+import inspect
+import importlib
 import json
-from scipy.interpolate import interp1d
-from scipy.signal import savgol_filter
-from scipy.spatial.distance import cdist
-from scipy import stats
+import fcntl
+import shutil
+import itertools
+import tempfile
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from constants import *
 from styling import *
 from paths import *
 
-fastf1.api.Cache.enable_cache(FF1_CACHE_DIR)
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # datasets fall back to being cached as pickles
+    pyarrow = None
+
+
+class LazyModule:
+    # a module imported on first attribute access, so that jobs only pay for importing the
+    # heavy dependencies they actually use
+    def __init__(self, name, on_import=None):
+        self.name = name
+        self.on_import = on_import
+        self.module = None
+
+    def __getattr__(self, attribute):
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+            if self.on_import is not None:
+                self.on_import(self.module)
+        return getattr(self.module, attribute)
+
+
+fastf1 = LazyModule(
+    "fastf1", on_import=lambda fastf1: fastf1.api.Cache.enable_cache(FF1_CACHE_DIR)
+)
+requests = LazyModule("requests")
+interpolate = LazyModule("scipy.interpolate")
+signal = LazyModule("scipy.signal")
+spatial = LazyModule("scipy.spatial")
+stats = LazyModule("scipy.stats")
 
 
 def fill_local_cache():
     for season in [2021, 2020, 2019, 2018]:
         # cache_tracks(season)
-        for session in (
-            get_all_race_sessions(season)
-            + get_all_sprint_sessions(season)
-            + get_all_qualifying_sessions(season)
-            + get_all_practice_sessions(season)
-            + get_all_testing_sessions(season)
+        for session in itertools.chain(
+            iter_race_sessions(season, prefetch=SESSION_LOADER_WORKERS),
+            iter_sprint_sessions(season, prefetch=SESSION_LOADER_WORKERS),
+            iter_qualifying_sessions(season, prefetch=SESSION_LOADER_WORKERS),
+            iter_practice_sessions(season, prefetch=SESSION_LOADER_WORKERS),
+            iter_testing_sessions(season, prefetch=SESSION_LOADER_WORKERS),
         ):
             print(season, session.info["Meeting"], session.info["Session"])
 
 
-def cache_migrate():
+def migrate_race_to_meeting(dataset, season):
+    return dataset.rename(columns={"Race": "Meeting"})
+
+
+# on-disk migrations of cached datasets, in the order they were introduced;
+# a dataset at cache version n has had the first n migrations applied
+CACHE_MIGRATIONS = [
+    migrate_race_to_meeting,
+]
+CACHE_VERSION = len(CACHE_MIGRATIONS)
+cache_versions_path = os.path.join(cache_directory, "cache_versions.json")
+
+
+def get_cache_versions():
+    if not os.path.exists(cache_versions_path):
+        return dict()
+    with open(cache_versions_path) as f:
+        return json.load(f)
+
+
+def set_cache_version(cache_path, version):
+    # datasets are built by several processes at once, so the read-modify-write of
+    # the versions file holds a lock and each writer stages into its own file
+    with open(cache_versions_path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        cache_versions = get_cache_versions()
+        cache_versions[os.path.basename(cache_path)] = version
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(cache_versions_path), suffix=".tmp", delete=False
+        ) as f:
+            json.dump(cache_versions, f, indent=4, sort_keys=True)
+        os.replace(f.name, cache_versions_path)
+
+
+def migrate_dataset(dataset, season, from_version):
+    for migration in CACHE_MIGRATIONS[from_version:]:
+        dataset = migration(dataset, season)
+    return dataset
+
+
+def get_cached_datasets():
+    # every dataset entry in the cache, whether a Parquet directory or a pickle
     entries = [
         os.path.join(cache_directory, filename)
         for filename in os.listdir(cache_directory)
     ]
-    cached_pickles = [
+    return [
         entry
         for entry in entries
-        if os.path.isfile(entry) and os.path.splitext(entry)[1] == ".pkl"
+        if (os.path.isdir(entry) and entry.endswith(".parquet"))
+        or (os.path.isfile(entry) and entry.endswith(".pkl"))
     ]
 
-    for cache_path in cached_pickles:
+
+def cache_migrate():
+    # brings every cached dataset up to CACHE_VERSION, running each pending migration once
+    cache_versions = get_cache_versions()
+    for cache_path in get_cached_datasets():
+        cached_version = cache_versions.get(os.path.basename(cache_path), 0)
+        if cached_version >= CACHE_VERSION:
+            continue
         print(cache_path)
         try:
-            dataset = pd.read_pickle(cache_path)
-            dataset = dataset.rename(columns={"Race": "Meeting"})
-            dataset.to_pickle(cache_path)
+            season = int(os.path.basename(cache_path).split("_")[0])
+            dataset = read_dataset(cache_path)
+            dataset = migrate_dataset(dataset, season, cached_version)
+            cache_path = write_dataset(dataset, os.path.splitext(cache_path)[0])
+            set_cache_version(cache_path, CACHE_VERSION)
         except:
             print("FAILED DATASET CACHE MIGRATION")
 
 
-def cache_dataset(cache_name, update_cache=False):
+FILTER_OPERATORS = {
+    "==": lambda column, value: column == value,
+    "=": lambda column, value: column == value,
+    "!=": lambda column, value: column != value,
+    "<": lambda column, value: column < value,
+    "<=": lambda column, value: column <= value,
+    ">": lambda column, value: column > value,
+    ">=": lambda column, value: column >= value,
+    "in": lambda column, value: column.isin(value),
+    "not in": lambda column, value: ~column.isin(value),
+}
+
+
+# partitioned datasets store each row's original position in this column and the
+# order of their columns in this file
+DATASET_ROW_COLUMN = "__row__"
+DATASET_LAYOUT_FILE = "_layout.json"
+
+
+def filter_dataset(dataset, filters=None):
+    # applies pyarrow-style filters, a list of (column, operator, value) tuples that must all hold,
+    # to a dataset in memory
+    if not filters:
+        return dataset
+    mask = np.ones(len(dataset), dtype=bool)
+    for column, operator, value in filters:
+        mask &= FILTER_OPERATORS[operator](dataset[column], value).to_numpy()
+    return dataset[mask]
+
+
+def write_dataset(dataset, cache_base):
+    # caches the dataset as Parquet partitioned by meeting (the season is part of the name),
+    # falling back to a pickle when pyarrow is missing or the dataset does not convert;
+    # returns the path written
+    parquet_path, pickle_path = cache_base + ".parquet", cache_base + ".pkl"
+    if pyarrow is not None:
+        staging_path = parquet_path + ".tmp"
+        shutil.rmtree(staging_path, ignore_errors=True)
+        try:
+            if isinstance(dataset, ChunkedDataset):
+                columns = dataset.write_parquet(staging_path)
+                write_dataset_layout(staging_path, columns, index=False)
+            elif "Meeting" in dataset.columns:
+                index = not dataset.index.equals(pd.RangeIndex(len(dataset)))
+                dataset.assign(**{DATASET_ROW_COLUMN: np.arange(len(dataset))}).to_parquet(
+                    staging_path, engine="pyarrow", partition_cols=["Meeting"], index=index
+                )
+                write_dataset_layout(staging_path, list(dataset.columns), index=index)
+            else:
+                dataset.to_parquet(staging_path, engine="pyarrow")
+            shutil.rmtree(parquet_path, ignore_errors=True)
+            os.replace(staging_path, parquet_path)
+            if os.path.exists(pickle_path):
+                os.remove(pickle_path)
+            return parquet_path
+        except Exception as exception:
+            print("FAILED PARQUET WRITE, CACHING AS PICKLE", exception)
+            shutil.rmtree(staging_path, ignore_errors=True)
+    if isinstance(dataset, ChunkedDataset):
+        dataset = dataset.to_frame()
+    dataset.to_pickle(pickle_path)
+    shutil.rmtree(parquet_path, ignore_errors=True)
+    return pickle_path
+
+
+def write_dataset_layout(path, columns, index):
+    # a partitioned dataset is read back grouped by meeting with the partition column last,
+    # so the written columns are recorded next to the partitions (files starting with an
+    # underscore are skipped by the reader) and every row carries its original position
+    with open(os.path.join(path, DATASET_LAYOUT_FILE), "w") as f:
+        json.dump({"columns": [str(column) for column in columns], "index": index}, f)
+
+
+def read_dataset_layout(path):
+    layout_path = os.path.join(path, DATASET_LAYOUT_FILE)
+    if not os.path.exists(layout_path):  # not partitioned, or cached before layouts were recorded
+        return None
+    with open(layout_path) as f:
+        return json.load(f)
+
+
+def read_parquet_dataset(path, columns=None, filters=None):
+    # only reads the requested columns and the meeting partitions matching the filters,
+    # in the row and column order the dataset was written in
+    layout = read_dataset_layout(path)
+    read_columns = columns
+    if layout is not None and columns is not None:
+        read_columns = list(columns) + [DATASET_ROW_COLUMN]
+    dataset = pd.read_parquet(
+        path,
+        engine="pyarrow",
+        columns=read_columns,
+        filters=filters,
+        memory_map=True,
+    )
+    if "Meeting" in dataset.columns:  # partition keys are read back as categoricals
+        dataset["Meeting"] = dataset["Meeting"].astype(str)
+    if layout is not None:
+        dataset = dataset.sort_values(DATASET_ROW_COLUMN, kind="stable")
+        if not layout["index"]:  # a plain range index, so the labels are the row positions
+            dataset.index = dataset[DATASET_ROW_COLUMN].to_numpy()
+        dataset = dataset[columns if columns is not None else layout["columns"]]
+    return dataset
+
+
+def read_dataset(cache_path, columns=None, filters=None):
+    if cache_path.endswith(".parquet"):
+        return read_parquet_dataset(cache_path, columns, filters)
+    dataset = filter_dataset(pd.read_pickle(cache_path), filters)
+    return dataset if columns is None else dataset[columns]
+
+
+def find_cached_dataset(cache_base):
+    for cache_path in [cache_base + ".parquet", cache_base + ".pkl"]:
+        if os.path.exists(cache_path) and (pyarrow is not None or cache_path.endswith(".pkl")):
+            return cache_path
+    return None
+
+
+class ChunkedDataset:
+    # accumulates a dataset chunk by chunk (e.g. one lap of telemetry at a time), spilling the
+    # buffered chunks to a part file every flush_every chunks so a season is never built in memory;
+    # returned from a cached getter, the parts are streamed into the cache without being concatenated
+    def __init__(self, flush_every=500):
+        self.flush_every = flush_every
+        self.directory = tempfile.mkdtemp(prefix="chunks_", dir=cache_directory)
+        self.chunks = []
+        self.parts = []
+
+    def append(self, chunk):
+        self.chunks.append(chunk)
+        if len(self.chunks) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.chunks:
+            return
+        part = pd.concat(self.chunks, ignore_index=True)
+        self.chunks = []
+        part_path = os.path.join(self.directory, f"part_{len(self.parts):05d}")
+        if pyarrow is not None:
+            try:
+                part.to_parquet(part_path + ".parquet", engine="pyarrow", index=False)
+                self.parts.append(part_path + ".parquet")
+                return
+            except:
+                print("FAILED PARQUET PART WRITE, SPILLING AS PICKLE")
+        part.to_pickle(part_path + ".pkl")
+        self.parts.append(part_path + ".pkl")
+
+    def iter_parts(self):
+        self.flush()
+        for part_path in self.parts:
+            if part_path.endswith(".parquet"):
+                yield pd.read_parquet(part_path, engine="pyarrow")
+            else:
+                yield pd.read_pickle(part_path)
+
+    def to_frame(self):
+        parts = list(self.iter_parts())
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def write_parquet(self, path):
+        # appends every part to a Parquet dataset partitioned by meeting, in the schema of the first part;
+        # returns the columns written
+        schema, columns, rows = None, [], 0
+        for part in self.iter_parts():
+            columns = columns or list(part.columns)
+            part = part.assign(**{DATASET_ROW_COLUMN: np.arange(rows, rows + len(part))})
+            rows += len(part)
+            table = pyarrow.Table.from_pandas(part, preserve_index=False)
+            schema = table.schema if schema is None else schema
+            pyarrow.parquet.write_to_dataset(
+                table.cast(schema),
+                path,
+                partition_cols=["Meeting"] if "Meeting" in part.columns else None,
+            )
+        return columns
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # building the dataset in a with block removes the spilled parts should the getter fail halfway,
+    # while a dataset that is returned is closed once it has been cached
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is not None:
+            self.close()
+
+
+def enrich_dataset(dataset, season):
+    # in-memory only, so corrections to DRIVER_TEAM apply without rewriting caches
+    if "Driver" in dataset.columns:
+        dataset = dataset.assign(Team=dataset["Driver"].map(DRIVER_TEAM[season]))
+    return dataset
+
+
+def get_dataset_cache_key(getter, version, arguments):
+    # fingerprint of the getter's name, all of its (default-completed) arguments,
+    # the getter's version and its source code, so changing any of them gives a new cache entry
+    fingerprint = repr(
+        (
+            getter.__name__,
+            list(arguments.arguments.items()),
+            version,
+            inspect.getsource(getter),
+        )
+    )
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:12]
+
+
+# every cached getter by function name
+cached_getters = dict()
+
+
+def cache_dataset(cache_name, update_cache=False, version=1):
+    # the wrapped getter additionally takes columns= and filters= to only load part of the dataset;
+    # they select from the cached dataset, so they are not part of its cache key
     def outer(getter):
         @functools.wraps(getter)
-        def wrapper(*args, **kwargs):
-            season = args[0]
-            cache_path = os.path.join(cache_directory, f"{season}_{cache_name}.pkl")
-            print(cache_path)
-            if not update_cache and os.path.exists(
-                cache_path
-            ):  # if cache exists, return the cached dataset
-
-                dataset = pd.read_pickle(cache_path)
-                dataset["Team"] = dataset["Driver"].apply(lambda val: get_team(season, val))
-                dataset.to_pickle(cache_path)
-                return pd.read_pickle(cache_path)
+        def wrapper(*args, columns=None, filters=None, **kwargs):
+            arguments = inspect.signature(getter).bind(*args, **kwargs)
+            arguments.apply_defaults()
+            season = arguments.arguments["season"]
+            cache_key = get_dataset_cache_key(getter, version, arguments)
+            cache_base = os.path.join(cache_directory, f"{season}_{cache_name}_{cache_key}")
+            cache_path = find_cached_dataset(cache_base)
+            print(cache_base)
+            if not update_cache and cache_path is not None:  # if cache exists, return the cached dataset
+                cached_version = get_cache_versions().get(os.path.basename(cache_path), 0)
+                if cached_version < CACHE_VERSION:
+                    dataset = migrate_dataset(read_dataset(cache_path), season, cached_version)
+                    cache_path = write_dataset(dataset, cache_base)
+                    set_cache_version(cache_path, CACHE_VERSION)
+                read_columns = columns
+                if columns is not None and "Team" in columns:  # Team is derived from Driver on read
+                    read_columns = [column for column in columns if column not in ["Team", "Driver"]] + ["Driver"]
+                dataset = enrich_dataset(read_dataset(cache_path, read_columns, filters), season)
+                return dataset if columns is None else dataset[columns]
             else:  # if cache does not exist, build the dataset and cache it for future use before returning
                 dataset = getter(*args, **kwargs)
-                dataset.to_pickle(cache_path)
-                return dataset
-
+                try:
+                    cache_path = write_dataset(dataset, cache_base)
+                    set_cache_version(cache_path, CACHE_VERSION)
+                finally:
+                    if isinstance(dataset, ChunkedDataset):
+                        dataset.close()
+                if isinstance(dataset, ChunkedDataset):  # never held in memory, so read it back
+                    dataset = read_dataset(cache_path, columns, filters)
+                dataset = enrich_dataset(filter_dataset(dataset, filters), season)
+                return dataset if columns is None else dataset[columns]
+
+        cached_getters[getter.__name__] = wrapper
         return wrapper
 
     return outer
 
 
-def get_all_race_sessions(season, selected_rounds=None):
-    all_events = fastf1.get_event_schedule(season)
+@functools.lru_cache(maxsize=None)
+def get_event_schedule(season):
+    return fastf1.get_event_schedule(season)
+
+
+def get_selected_events(season, selected_rounds=None):
+    all_events = get_event_schedule(season)
     if selected_rounds is not None:
-        selected_events = all_events[all_events]
-    else:
-        selected_events = all_events[all_events["RoundNumber"] > 0]
-    race_sessions = []
-    for index, event in selected_events.iterrows():
-        print(season, event["EventName"])
-        try:
-            race_sessions.append(get_session(season, event["EventName"], "Race"))
-        except:
-            print("ERROR RETRIEVING MEETING RACE")
-    return race_sessions
+        return all_events[all_events["RoundNumber"].isin(selected_rounds)]
+    return all_events[all_events["RoundNumber"] > 0]
 
 
-def get_all_sprint_sessions(season, selected_rounds=None):
+def get_race_session_requests(season, selected_rounds=None):
+    return [
+        (season, event["EventName"], "Race")
+        for index, event in get_selected_events(season, selected_rounds).iterrows()
+    ]
+
+
+def get_sprint_session_requests(season, selected_rounds=None):
     sprint_rounds = {2021: [10, 14, 19], 2022: []}[season]
     if selected_rounds is not None and all(
         round in sprint_rounds for round in selected_rounds
@@ -101,74 +423,291 @@ def get_all_sprint_sessions(season, selected_rounds=None):
     else:
         rounds = sprint_rounds
     if season in [2021, 2022]:
-        sprint_race_sessions = []
-        for round_number in rounds:
-            print(season, round_number)
-            sprint_race_sessions.append(get_session(season, round_number, "Sprint Qualifying"))
-        return sprint_race_sessions
+        return [(season, round_number, "Sprint Qualifying") for round_number in rounds]
     else:
         return []
 
 
-def get_all_qualifying_sessions(season, selected_rounds=None):
-    all_events = fastf1.get_event_schedule(season)
-    if selected_rounds is not None:
-        selected_events = all_events[all_events]
-    else:
-        selected_events = all_events[all_events["RoundNumber"] > 0]
-    qualifying_sessions = []
-    for index, event in selected_events.iterrows():
-        print(season, event["EventName"])
-        try:
-            qualifying_sessions.append(get_session(season, event["EventName"], "Qualifying"))
-        except:
-            print("ERROR RETRIEVING MEETING QUALIFYING")
-    return qualifying_sessions
+def get_qualifying_session_requests(season, selected_rounds=None):
+    return [
+        (season, event["EventName"], "Qualifying")
+        for index, event in get_selected_events(season, selected_rounds).iterrows()
+    ]
 
 
-def get_all_practice_sessions(season, selected_rounds=None):
+def get_practice_session_requests(season, selected_rounds=None):
     sprint_rounds = [10, 14, 19]
     if selected_rounds is not None:
         rounds = selected_rounds
     else:
         rounds = range(1, len(CALENDAR[season]) + 1)
-    practice_sessions = []
+    session_requests = []
     for round_number in rounds:
-        print(season, round_number)
-        try:
-            practice_sessions.append(get_session(season, round_number, "Practice 1"))
-        except:
-            print("ERROR RETRIEVING MEETING FP1")
-        try:
-            practice_sessions.append(get_session(season, round_number, "Practice 2"))
-        except:
-            print("ERROR RETRIEVING MEETING FP2")
-            pass
+        session_requests.append((season, round_number, "Practice 1"))
+        session_requests.append((season, round_number, "Practice 2"))
         if round_number not in sprint_rounds:
-            try:
-                practice_sessions.append(get_session(season, round_number, "Practice 3"))
-            except:
-                print("ERROR RETRIEVING MEETING FP3")
-    return practice_sessions
+            session_requests.append((season, round_number, "Practice 3"))
+    return session_requests
 
 
-def get_all_testing_sessions(season):
-    testing_sessions = []
-    for test_number in [1, 2, 3]:
-        for day in [1, 2, 3]:
-            try:
-                testing_sessions.append(get_session(season, f"Test {test_number}", day))
-            except:
-                pass
-    return testing_sessions
+def get_testing_session_requests(season):
+    return [
+        (season, f"Test {test_number}", day)
+        for test_number in [1, 2, 3]
+        for day in [1, 2, 3]
+    ]
+
+
+# the get_all_* getters return every session of the season at once, while the iter_* getters
+# yield them one at a time so a season never has to fit in memory
+def get_all_race_sessions(season, selected_rounds=None, workers=None):
+    return load_sessions(get_race_session_requests(season, selected_rounds), workers=workers)
+
+
+def get_all_sprint_sessions(season, selected_rounds=None, workers=None):
+    return load_sessions(get_sprint_session_requests(season, selected_rounds), workers=workers)
+
+
+def get_all_qualifying_sessions(season, selected_rounds=None, workers=None):
+    return load_sessions(get_qualifying_session_requests(season, selected_rounds), workers=workers)
+
+
+def get_all_practice_sessions(season, selected_rounds=None, workers=None):
+    return load_sessions(get_practice_session_requests(season, selected_rounds), workers=workers)
+
+
+def get_all_testing_sessions(season, workers=None):
+    return load_sessions(get_testing_session_requests(season), workers=workers)
+
+
+def iter_race_sessions(season, selected_rounds=None, prefetch=1):
+    return iter_sessions(get_race_session_requests(season, selected_rounds), prefetch=prefetch)
+
+
+def iter_sprint_sessions(season, selected_rounds=None, prefetch=1):
+    return iter_sessions(get_sprint_session_requests(season, selected_rounds), prefetch=prefetch)
+
+
+def iter_qualifying_sessions(season, selected_rounds=None, prefetch=1):
+    return iter_sessions(get_qualifying_session_requests(season, selected_rounds), prefetch=prefetch)
+
+
+def iter_practice_sessions(season, selected_rounds=None, prefetch=1):
+    return iter_sessions(get_practice_session_requests(season, selected_rounds), prefetch=prefetch)
+
+
+def iter_testing_sessions(season, prefetch=1):
+    return iter_sessions(get_testing_session_requests(season), prefetch=prefetch)
 
 
 def laps_per_driver(session):
     return session.laps.groupby("Driver")
 
-def get_session(season, meeting, session_identifier):
+def get_session_size(session):
+    # estimated in-memory size of a loaded session, its laps plus car and position telemetry
+    frames = [session.laps]
+    for telemetry in [getattr(session, "car_data", None), getattr(session, "pos_data", None)]:
+        frames += list((telemetry or dict()).values())
+    return int(
+        sum(frame.memory_usage(deep=frame is session.laps).sum() for frame in frames)
+    )
+
+
+class SessionCache:
+    # loaded sessions by (season, meeting, session identifier), evicting the least recently
+    # used once there are more than max_sessions or they take up more than max_bytes;
+    # sessions are shared between callers, so copy session.laps before modifying it
+    def __init__(self, max_sessions=8, max_bytes=4 * 1024 ** 3):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sessions = OrderedDict()
+        self.sizes = dict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def total_bytes(self):
+        return sum(self.sizes.values())
+
+    def get(self, key):
+        if key not in self.sessions:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.sessions.move_to_end(key)
+        return self.sessions[key]
+
+    def put(self, key, session):
+        self.sessions[key] = session
+        self.sessions.move_to_end(key)
+        self.sizes[key] = get_session_size(session)
+        # the session just added is kept even if it alone exceeds max_bytes
+        while len(self.sessions) > 1 and (
+            len(self.sessions) > self.max_sessions or self.total_bytes > self.max_bytes
+        ):
+            evicted_key, _ = self.sessions.popitem(last=False)
+            del self.sizes[evicted_key]
+            self.evictions += 1
+
+    def clear(self):
+        self.sessions.clear()
+        self.sizes.clear()
+
+    def stats(self):
+        return dict(
+            Hits=self.hits,
+            Misses=self.misses,
+            Evictions=self.evictions,
+            Sessions=len(self.sessions),
+            Bytes=self.total_bytes,
+        )
+
+
+session_cache = SessionCache()
+
+
+def get_session(season, meeting, session_identifier, cached=True):
+    key = (season, meeting, session_identifier)
+    if cached:
+        session = session_cache.get(key)
+        if session is not None:
+            return session
+    session = load_session(season, meeting, session_identifier)
+    if cached:
+        session_cache.put(key, session)
+    return session
+
+
+SESSION_LOADER_WORKERS = os.cpu_count() or 1
+
+
+def load_session_or_none(session_request):
+    # runs in the loader's worker processes, where a failing session must not take down the pool
+    try:
+        return load_session(*session_request)
+    except:
+        print("ERROR RETRIEVING SESSION", *session_request)
+        return None
+
+
+class SessionScope:
+    # while active, restricts the session getters to the given rounds of a season and records the
+    # sessions they request, so a season getter can be run for a single round; the few sessions of
+    # those rounds are kept in the session cache meanwhile, so every getter run in the scope shares them
+    def __init__(self, season, round_numbers):
+        self.season = season
+        self.round_numbers = set(round_numbers)
+        self.session_requests = []
+        self.failed_requests = []
+
+    def __enter__(self):
+        global session_scope
+        session_scope = self
+        return self
+
+    def __exit__(self, *exception):
+        global session_scope
+        session_scope = None
+
+    def includes(self, session_request):
+        season, meeting, session_identifier = session_request
+        if season != self.season:
+            return False
+        if isinstance(meeting, str):  # meetings are requested either by name or by round number
+            events = get_event_schedule(season)
+            return any(
+                round_number in self.round_numbers
+                for round_number in events.loc[events["EventName"] == meeting, "RoundNumber"]
+            )
+        return meeting in self.round_numbers
+
+
+session_scope = None
+
+
+def scope_session_requests(session_requests):
+    if session_scope is None:
+        return list(session_requests)
+    scoped_requests = [request for request in session_requests if session_scope.includes(request)]
+    session_scope.session_requests += scoped_requests
+    return scoped_requests
+
+
+def load_sessions(session_requests, workers=None):
+    # loads (season, meeting, session identifier) requests that are not already cached
+    # in a process pool, returning the sessions that loaded in the order they were requested
+    session_requests = scope_session_requests(session_requests)
+    workers = SESSION_LOADER_WORKERS if workers is None else workers
+    sessions = {request: session_cache.get(request) for request in session_requests}
+    pending = [request for request, session in sessions.items() if session is None]
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            loaded = list(executor.map(load_session_or_none, pending))
+    else:
+        loaded = [load_session_or_none(request) for request in pending]
+    for request, session in zip(pending, loaded):
+        sessions[request] = session
+        if session is not None:
+            session_cache.put(request, session)
+        elif session_scope is not None:
+            session_scope.failed_requests.append(request)
+    return [
+        sessions[request]
+        for request in session_requests
+        if sessions[request] is not None
+    ]
+
+
+def iter_sessions(session_requests, prefetch=1):
+    # yields the requested sessions in order, loading up to `prefetch` of the following ones
+    # in worker processes meanwhile; streamed sessions are not added to the session cache
+    # (unless a SessionScope is active), so each can be garbage-collected once the consumer moves on
+    session_requests = iter(scope_session_requests(session_requests))
+
+    def loaded(request, session):
+        if session_scope is not None:
+            if session is not None:
+                session_cache.put(request, session)
+            else:
+                session_scope.failed_requests.append(request)
+        return session
+
+    if prefetch < 1:
+        for request in session_requests:
+            session = session_cache.get(request)
+            if session is None:
+                session = loaded(request, load_session_or_none(request))
+            if session is not None:
+                yield session
+            del session
+        return
+
+    def submit(executor, request):
+        session = session_cache.get(request)
+        return request, (
+            session if session is not None else executor.submit(load_session_or_none, request)
+        )
+
+    with ProcessPoolExecutor(max_workers=prefetch) as executor:
+        in_flight = deque(
+            submit(executor, request)
+            for request in itertools.islice(session_requests, prefetch)
+        )
+        while in_flight:
+            request, session = in_flight.popleft()
+            for next_request in itertools.islice(session_requests, 1):
+                in_flight.append(submit(executor, next_request))
+            if isinstance(session, Future):
+                session = loaded(request, session.result())
+            if session is not None:
+                yield session
+            del session
+
+
+def load_session(season, meeting, session_identifier):
     print(season, meeting, session_identifier)
-    session = fastf1.get_event_schedule(season).get_event_by_name(meeting).get_session(session_identifier)
+    session = get_event_schedule(season).get_event_by_name(meeting).get_session(session_identifier)
     
     session.info = dict(
         Season=season, Meeting=session.event.EventName, Session=session_identifier
@@ -260,83 +799,350 @@ def fetch_lap(season, meeting, session_identifier, driver_identifier, lap_number
     )
     return LapContainer(enhance_telemetry(selected_lap))
 
-def enhance_telemetry(lap):
-    telemetry = lap.telemetry.rename(columns=dict(nGear="Gear")).reset_index(
-        drop=True
+# channels resampled onto the 1 m distance grid, in output column order
+RESAMPLED_CHANNELS = [
+    "TimeInSeconds",
+    "Speed",
+    "RPM",
+    "Gear",
+    "Throttle",
+    "Brake",
+    "DRS",
+    "X",
+    "Y",
+    "Z",
+]
+# channels filtered with Savitsky Golay before resampling
+SMOOTHED_CHANNELS = ["Distance", "TimeInSeconds", "Speed", "Throttle", "X", "Y", "Z"]
+SMOOTHING_WINDOW = 7
+
+
+def interpolate_to_distance(distance, values, new_distance, lengths=None, new_lengths=None):
+    # linear interpolation of every column of values at once, extrapolating
+    # beyond the ends exactly like interp1d(fill_value="extrapolate"). When lengths
+    # are given, the arrays hold several laps back to back and every lap is only
+    # interpolated within its own samples.
+    if lengths is None:
+        lengths, new_lengths = [len(distance)], [len(new_distance)]
+    lengths, new_lengths = np.asarray(lengths), np.asarray(new_lengths)
+    segment = np.repeat(np.arange(len(lengths)), lengths)
+    new_segment = np.repeat(np.arange(len(lengths)), new_lengths)
+
+    # sort each lap by distance without mixing samples of different laps
+    order = np.lexsort((distance, segment))
+    distance, values = distance[order], values[order]
+
+    # offset every lap along the distance axis so one search covers all laps
+    lowest = min(distance.min(), new_distance.min(), 0)
+    span = max(distance.max(), new_distance.max()) - lowest + 1
+    upper = np.searchsorted(
+        segment * span + (distance - lowest),
+        new_segment * span + (new_distance - lowest),
     )
-    telemetry["TimeInSeconds"] = telemetry["Time"].dt.total_seconds()
+    first_sample = (np.cumsum(lengths) - lengths)[new_segment]
+    upper = upper.clip(first_sample + 1, first_sample + lengths[new_segment] - 1)
+    lower = upper - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (values[upper] - values[lower]) / (
+            distance[upper] - distance[lower]
+        )[:, None]
+    return slope * (new_distance - distance[lower])[:, None] + values[lower]
+
+
+def resample_laps(lap_samples):
+    # Smooths and resamples laps given as 2-D arrays with the columns
+    # ["Distance"] + RESAMPLED_CHANNELS. Every lap is filtered on its own so the
+    # Savitsky Golay window never spans two laps, while the resampling onto the
+    # 1 m distance grids runs for all laps in a single pass.
+    columns = ["Distance"] + RESAMPLED_CHANNELS
+    smoothed = [columns.index(column) for column in SMOOTHED_CHANNELS]
+    for samples in lap_samples:
+        samples[:, smoothed] = signal.savgol_filter(
+            samples[:, smoothed], window_length=SMOOTHING_WINDOW, polyorder=1, axis=0
+        )
+
+    lengths = [len(samples) for samples in lap_samples]
+    new_lengths = np.array([max(round(samples[-1, 0]), 0) for samples in lap_samples])
+    new_distance = np.concatenate([np.arange(length, dtype=float) for length in new_lengths])
+    samples = np.concatenate(lap_samples)
+    resampled = interpolate_to_distance(
+        samples[:, 0], samples[:, 1:], new_distance, lengths, new_lengths
+    )
+
+    # every lap starts at zero seconds
+    first_rows = (np.cumsum(new_lengths) - new_lengths)[new_lengths > 0]
+    resampled[first_rows, 0] = 0
+
+    return resampled, new_lengths
+
+
+def build_telemetry_frame(resampled, new_lengths, index=None):
+    telemetry = pd.DataFrame(resampled, columns=RESAMPLED_CHANNELS, index=index)
+    telemetry["Distance"] = np.concatenate(
+        [np.arange(length) for length in new_lengths]
+    )
+    telemetry["Gear"] = telemetry["Gear"].round()
+    telemetry["Time"] = pd.to_timedelta(telemetry["TimeInSeconds"], unit="s")
+    return telemetry
+
+
+def resample_telemetry(telemetry):
+    # Smooths and resamples all channels of a lap's merged telemetry in one pass
+    # on a single 2-D array. The resampled channels match the former per-column
+    # savgol_filter/interp1d implementation exactly; Time is built with
+    # pd.to_timedelta and may differ from pd.Timedelta(seconds=...) by at most 1 ns.
+    telemetry = telemetry.rename(columns=dict(nGear="Gear"))
+    samples = np.column_stack(
+        [telemetry["Distance"].to_numpy(dtype=float)]
+        + [telemetry["Time"].dt.total_seconds().to_numpy()]
+        + [telemetry[column].to_numpy(dtype=float) for column in RESAMPLED_CHANNELS[1:]]
+    )
+    resampled, new_lengths = resample_laps([samples])
+    return build_telemetry_frame(resampled, new_lengths)
+
+
+def enhance_telemetry(lap):
+    lap.telemetry = resample_telemetry(lap.telemetry)
+
+    return lap
+
+
+def enhance_session_telemetry(session, laps):
+    # Resamples many laps of a session at once. Car and position data are
+    # sliced once per driver instead of once per lap through lap.telemetry and
+    # all laps are resampled in one pass. Returns a frame indexed by
+    # (LapIndex, Distance), where LapIndex is the lap's label in laps. Distance
+    # is integrated from the car data of each lap, so it can differ by a few
+    # metres from lap.telemetry, which integrates it before merging position data.
+    # Laps without timing or with too few samples are left out.
+    laps = laps[laps["LapStartTime"].notnull() & laps["Time"].notnull()]
+    car_channels = ["Speed", "RPM", "nGear", "Throttle", "Brake", "DRS"]
+    position_channels = ["X", "Y", "Z"]
+
+    lap_indices, lap_samples = [], []
+    for driver_number, driver_laps in laps.groupby("DriverNumber"):
+        try:
+            car_data = session.car_data[driver_number]
+            pos_data = session.pos_data[driver_number]
+        except KeyError:
+            print("[TELEMETRY MISSING FOR DRIVER]", driver_number)
+            continue
+        if len(car_data) < SMOOTHING_WINDOW or len(pos_data) < 2:
+            print("[TELEMETRY TOO SHORT FOR DRIVER]", driver_number)
+            continue
 
-    # filter with Savitsky Golay
-    for column in ["Distance", "TimeInSeconds", "Speed", "Throttle", "X", "Y", "Z"]:
-        telemetry[column] = savgol_filter(
-            telemetry[column], window_length=7, polyorder=1
+        session_time = car_data["SessionTime"].dt.total_seconds().to_numpy()
+        position_time = pos_data["SessionTime"].dt.total_seconds().to_numpy()
+        channels = np.column_stack(
+            [car_data[column].to_numpy(dtype=float) for column in car_channels]
+            + [
+                np.interp(session_time, position_time, pos_data[column].to_numpy(dtype=float))
+                for column in position_channels
+            ]
         )
 
-    # resample and interpolate to distance
-    interpolation_columns = [
-        "TimeInSeconds",
-        "Speed",
-        "RPM",
-        "Gear",
-        "Throttle",
-        "Brake",
-        "DRS",
-        "X",
-        "Y",
-        "Z",
-    ]
-    interpolated_telemetry = pd.DataFrame()
-    new_index = range(round(telemetry.iloc[-1]["Distance"]))
-    for column in interpolation_columns:
-        interp = interp1d(
-            telemetry["Distance"],
-            telemetry[column],
-            fill_value="extrapolate",
+        lap_starts = driver_laps["LapStartTime"].dt.total_seconds().to_numpy()
+        lap_ends = driver_laps["Time"].dt.total_seconds().to_numpy()
+        first_samples = np.searchsorted(session_time, lap_starts)
+        last_samples = np.searchsorted(session_time, lap_ends, side="right")
+        for lap_index, lap_start, first, last in zip(
+            driver_laps.index, lap_starts, first_samples, last_samples
+        ):
+            if last - first < SMOOTHING_WINDOW:
+                continue
+            time = session_time[first:last] - lap_start
+            distance = np.cumsum(channels[first:last, 0] / 3.6 * np.diff(time, prepend=0))
+            lap_samples.append(np.column_stack([distance, time, channels[first:last]]))
+            lap_indices.append(lap_index)
+
+    if not lap_samples:
+        return pd.DataFrame(
+            columns=RESAMPLED_CHANNELS + ["Distance", "Time"],
+            index=pd.MultiIndex.from_arrays([[], []], names=["LapIndex", None]),
         )
-        interpolated_telemetry[column] = interp(new_index)
-    interpolated_telemetry[
-        "Distance"
-    ] = interpolated_telemetry.index.astype(int)
-    interpolated_telemetry["Gear"] = interpolated_telemetry[
-        "Gear"
-    ].round()
-    interpolated_telemetry.loc[0, "TimeInSeconds"] = 0
-    interpolated_telemetry["Time"] = interpolated_telemetry[
-        "TimeInSeconds"
-    ].apply(lambda seconds: pd.Timedelta(seconds=seconds))
-
-    lap.telemetry = interpolated_telemetry
 
-    return lap
+    resampled, new_lengths = resample_laps(lap_samples)
+    index = pd.MultiIndex.from_arrays(
+        [
+            np.repeat(lap_indices, new_lengths),
+            np.concatenate([np.arange(length) for length in new_lengths]),
+        ],
+        names=["LapIndex", None],
+    )
+    return build_telemetry_frame(resampled, new_lengths, index=index)
+
+
+def iter_session_telemetry(session, laps):
+    session_telemetry = enhance_session_telemetry(session, laps)
+    for lap_index, data in session_telemetry.groupby(level="LapIndex", sort=False):
+        # a plain Series rather than a Lap, so collected laps do not keep the whole session alive
+        yield lap_index, pd.Series(laps.loc[lap_index]), data.droplevel("LapIndex")
 
 def get_track_cache_path(season, meeting):
+    # per-session track caches as written before the track store, read only to import them into it
     return os.path.join(
-        cache_directory,
-        "tracks",
+        tracks_cache_directory,
         f"""{meeting.replace("Grand Prix", "GP").replace(" ", "")}_{season}_Track.pkl""".replace(" ", "_"),
     )
 
 def get_track_name(season, meeting):
     return [round for round in CALENDAR[season] if round.name == meeting][0].track_name
 
-def determine_track_section(sections, percentage):
-    determined_section = ""
-    for percentage_completed, section_name in sections.items():
-        if percentage >= percentage_completed:
-            determined_section = section_name
-        else:
-            break
-    return determined_section
+class SectionIndex:
+    # a track's TRACKS_SECTIONS as sorted boundaries, so a whole lap is labelled in one searchsorted;
+    # a sample is in the section of the last boundary it has passed, or "" before the first one
+    def __init__(self, sections):
+        boundaries = sorted(sections.items())
+        self.boundaries = np.array([percentage for percentage, _ in boundaries], dtype=float)
+        names = [""] + [section_name for _, section_name in boundaries]
+        self.names = names[1:]
+        self.categories = list(dict.fromkeys(names))
+        self.codes = np.array([self.categories.index(name) for name in names])
+
+    def label(self, percentage):
+        percentage = np.asarray(percentage, dtype=float)
+        positions = np.searchsorted(self.boundaries, percentage, side="right")
+        positions[np.isnan(percentage)] = 0
+        return pd.Categorical.from_codes(self.codes[positions], self.categories)
+
+
+@functools.lru_cache(maxsize=None)
+def get_section_index(track_name):
+    return SectionIndex(TRACKS_SECTIONS[track_name])
+
+
+def compute_section_times(progress, times, lengths, boundaries):
+    # progress (percentage of the track) and times of the samples of several laps, concatenated lap by
+    # lap with lengths[i] samples for lap i, to a (lap x section) matrix of the time taken from each
+    # boundary to the next (the last section ending at 100 %); the moment a boundary is crossed is
+    # interpolated between the samples either side of it, and boundaries a lap does not cover
+    # (e.g. it starts past the line) are crossed at its first or last sample
+    lap_numbers = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    ends = starts + np.asarray(lengths) - 1
+
+    # progress wraps from 100 to 0 at the line, so unwrap it and make each lap start around 0
+    progress = np.unwrap(np.asarray(progress, dtype=float), period=100)
+    progress -= (100 * np.round(progress[starts] / 100))[lap_numbers]
+
+    # keep every lap's progress non-decreasing and lay the laps out one after another,
+    # so a single interpolation covers all of them without crossing from one lap into the next
+    span = progress.max() - progress.min() + 1
+    keys = np.maximum.accumulate(progress + lap_numbers * span)
+    edges = np.append(boundaries, 100)
+    crossings = np.clip(
+        edges[None, :] + (np.arange(len(lengths)) * span)[:, None],
+        keys[starts][:, None],
+        keys[ends][:, None],
+    )
+    crossing_times = np.interp(crossings.ravel(), keys, np.asarray(times, dtype=float))
+    return np.diff(crossing_times.reshape(crossings.shape), axis=1)
+
+class TrackIndex:
+    # nearest track point lookups for a whole lap at once, against a track cached by cache_tracks
+    def __init__(self, track):
+        self.points = track[["X", "Y"]].to_numpy(dtype=float)
+        self.tree = spatial.cKDTree(self.points)
+
+    def locate(self, x, y, window=None):
+        # index of the closest track point to each sample; with a window, a sample whose closest
+        # point is more than `window` points away from the previous sample's is instead matched
+        # within that window, as cars move steadily along the track rather than jumping to
+        # another part of it where the track runs close to or crosses itself
+        samples = np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])
+        locations = self.tree.query(samples)[1]
+        if window is None:
+            return locations
+
+        track_points = len(self.points)
+        steps = np.arange(-window, window + 1)
+        for sample_index in range(1, len(samples)):
+            previous = locations[sample_index - 1]
+            progress = (locations[sample_index] - previous) % track_points
+            if progress <= window or progress >= track_points - window:
+                continue
+            candidates = (previous + steps) % track_points
+            offsets = self.points[candidates] - samples[sample_index]
+            locations[sample_index] = candidates[np.einsum("ij,ij->i", offsets, offsets).argmin()]
+        return locations
+
+
+class TrackGeometry:
+    # a circuit's centerline, evenly spaced along its length, with the cumulative arc length and
+    # section of every point, a nearest point index and its TRACKS_SECTIONS boundaries as point indices
+    def __init__(self, track_name, track):
+        self.track_name = track_name
+        self.index = TrackIndex(track)
+        self.sections = (
+            get_section_index(track_name) if track_name in TRACKS_SECTIONS else None
+        )
+        if "ArcLength" not in track.columns:
+            track = track.assign(
+                ArcLength=np.concatenate(
+                    [[0], np.cumsum(np.hypot(*np.diff(self.index.points, axis=0).T))]
+                )
+            )
+        if self.sections is not None and "Section" not in track.columns:
+            track = track.assign(
+                Section=self.sections.label(np.arange(len(track)) / len(track) * 100)
+            )
+        self.track = track
+        self.section_boundaries = (
+            None
+            if self.sections is None
+            else (self.sections.boundaries / 100 * len(track)).astype(int)
+        )
+
+
+class TrackStore:
+    # track geometries by circuit name, each read from disk at most once per process
+    # and shared by every consumer
+    def __init__(self, directory=tracks_cache_directory):
+        self.directory = directory
+        self.geometries = dict()
+
+    def get_path(self, track_name):
+        return os.path.join(self.directory, track_name.replace(" ", "_") + ".pkl")
+
+    def get(self, track_name):
+        if track_name not in self.geometries:
+            self.geometries[track_name] = TrackGeometry(
+                track_name, pd.read_pickle(self.get_path(track_name))
+            )
+        return self.geometries[track_name]
+
+    def put(self, track_name, track):
+        geometry = TrackGeometry(track_name, track)
+        os.makedirs(self.directory, exist_ok=True)
+        geometry.track.to_pickle(self.get_path(track_name))
+        self.geometries[track_name] = geometry
+        return geometry
+
+    def __contains__(self, track_name):
+        return track_name in self.geometries or os.path.exists(self.get_path(track_name))
+
 
-def add_track_locations(lap):
+track_store = TrackStore()
+
+
+def get_track_geometry(season, meeting):
+    track_name = get_track_name(season, meeting)
+    if track_name not in track_store and os.path.exists(get_track_cache_path(season, meeting)):
+        track_store.put(track_name, pd.read_pickle(get_track_cache_path(season, meeting)))
+    return track_store.get(track_name)
+
+
+def add_track_locations(lap, window=None):
     season, meeting = lap.session.t0_date.year, lap.session.event.EventName
-    # lap.track = pd.read_pickle(get_track_cache_path(season, meeting))
-    lap.telemetry["Location"] = lap.telemetry.apply(lambda sample: cdist([(sample["X"], sample["Y"])], lap.track[["X", "Y"]]).argmin(), axis=1)
+    track_geometry = get_track_geometry(season, meeting)
+    lap.track = track_geometry.track
+    lap.telemetry["Location"] = track_geometry.index.locate(
+        lap.telemetry["X"], lap.telemetry["Y"], window=window
+    )
     lap.telemetry["PercentageCompleted"] = (lap.telemetry["Location"] / len(lap.track)) * 100
     # lap.telemetry["PercentageCompleted"] = lap.telemetry["Distance"].apply(lambda distance: distance / lap.telemetry.iloc[-1]["Distance"]) * 100
 
-    track_sections = TRACKS_SECTIONS[get_track_name(season, meeting)]
-    lap.telemetry["Section"] = lap.telemetry["PercentageCompleted"].apply(lambda percentage: determine_track_section(track_sections, percentage))
+    lap.telemetry["Section"] = track_geometry.sections.label(lap.telemetry["PercentageCompleted"])
 
     return lap
 
@@ -349,6 +1155,67 @@ def correct_distance_offset(laps):
         # lap.telemetry.set_index("Location", drop=True, inplace=True)
 
 
+class LapAlignment:
+    # laps mapped onto one grid of track positions, from the start to the end of the lap, so laps
+    # of different total distances are compared at the same point of the track rather than after
+    # the same number of metres; positions are the fraction of each lap's own distance, or with a
+    # track geometry, where on the circuit's centerline each sample is
+    def __init__(self, laps, reference_index=0, track_geometry=None, resolution=None):
+        self.laps = laps
+        self.reference_index = reference_index
+        self.track_geometry = track_geometry
+        self.lap_positions = [self.get_positions(lap) for lap in laps]
+        self.grid = np.linspace(
+            0, 1, resolution or max(len(lap.telemetry) for lap in laps)
+        )
+        self.aligned_channels = dict()
+
+    def get_positions(self, lap):
+        distance = lap.telemetry["Distance"].to_numpy(dtype=float)
+        if self.track_geometry is None:
+            return distance / distance[-1]
+
+        arc_length = self.track_geometry.track["ArcLength"].to_numpy()
+        locations = self.track_geometry.index.locate(
+            lap.telemetry["X"], lap.telemetry["Y"], window=SECTION_TIMES_WINDOW
+        )
+        positions = arc_length[locations] / arc_length[-1]
+        # samples either side of the line can be matched to the other end of the centerline
+        first_half = distance < distance[-1] / 2
+        positions[first_half & (positions > 0.5)] = 0
+        positions[~first_half & (positions < 0.5)] = 1
+        return np.maximum.accumulate(positions)
+
+    def align(self, channel_name):
+        # the channel of every lap on the grid, as a laps x grid array
+        if channel_name not in self.aligned_channels:
+            self.aligned_channels[channel_name] = np.vstack(
+                [
+                    np.interp(
+                        self.grid,
+                        positions,
+                        lap.telemetry[channel_name].to_numpy(dtype=float),
+                    )
+                    for lap, positions in zip(self.laps, self.lap_positions)
+                ]
+            )
+        return self.aligned_channels[channel_name]
+
+    def get_deltas(self):
+        # the time every lap is behind the reference lap at each point of the grid
+        if "Delta" not in self.aligned_channels:
+            times = self.align("TimeInSeconds")
+            self.aligned_channels["Delta"] = times - times[self.reference_index]
+        return self.aligned_channels["Delta"]
+
+    def get_lap_deltas(self):
+        # the deltas at every lap's own samples, to be plotted against its own distance
+        return [
+            np.interp(positions, self.grid, deltas)
+            for positions, deltas in zip(self.lap_positions, self.get_deltas())
+        ]
+
+
 def get_team(season, driver_identifier):
     return DRIVER_TEAM[season][driver_identifier]
 
@@ -378,6 +1245,10 @@ def filter_standin_drivers(dataset):
     return filtered_dateset
 
 
+# laps of 1 m resolution telemetry buffered before they are spilled to disk
+ENGINE_DATA_FLUSH_EVERY = 500
+
+
 @cache_dataset("Engine_RPM")
 def get_all_engine_data(season):
     columns = [
@@ -390,29 +1261,19 @@ def get_all_engine_data(season):
         "LapNumber",
         "Meeting",
     ]
-    all_engine_data = pd.DataFrame(columns=columns).astype(
-        dict(Speed=int, Gear=int, Throttle=int, RPM=int, LapNumber=int)
-    )
-    # for session in get_all_race_sessions(season):
-    for session in get_all_testing_sessions(season):
-        print(session.info["Meeting"])
-        for driver_identifier, laps in laps_per_driver(session):
-            print(driver_identifier)
-
-            laps = laps[laps["LapTime"].notnull() & laps["IsAccurate"]]
-
-            for lap_number, lap in laps.iterrows():
-                try:
-                    data = enhance_telemetry(lap).telemetry
-                except:
-                    continue
+    with ChunkedDataset(flush_every=ENGINE_DATA_FLUSH_EVERY) as all_engine_data:
+        # for session in get_all_race_sessions(season):
+        for session in iter_testing_sessions(season):
+            print(session.info["Meeting"])
+            laps = session.laps[session.laps["LapTime"].notnull() & session.laps["IsAccurate"]]
+
+            for lap_number, lap, data in iter_session_telemetry(session, laps):
+                driver_identifier = lap["Driver"]
                 data["Driver"] = driver_identifier
                 data["Team"] = get_team(season, driver_identifier)
                 data["LapNumber"] = int(lap_number)
                 data["Meeting"] = session.info["Meeting"]
-                all_engine_data = all_engine_data.append(
-                    data[columns], ignore_index=True
-                )
+                all_engine_data.append(data[columns])
 
     # all_engine_data = filter_standin_drivers(all_engine_data)
     return all_engine_data
@@ -422,16 +1283,14 @@ def get_all_engine_data(season):
 def get_all_launches(season):
     compounds_to_compare = ["SOFT", "MEDIUM", "HARD"]
     launches = []
-    for session in get_all_race_sessions(season):
+    for session in iter_race_sessions(season):
         print(session.info["Meeting"])
-        for driver_identifier, laps in laps_per_driver(session):
+        first_laps = session.laps.groupby("Driver").head(1)
+        first_laps = first_laps[first_laps["Compound"].isin(compounds_to_compare)]
+        for _, first_lap, data in iter_session_telemetry(session, first_laps):
+            driver_identifier = first_lap["Driver"]
             print(driver_identifier)
             try:
-                first_lap = laps.iloc[0]
-                if not first_lap["Compound"] in compounds_to_compare:
-                    continue
-                data = enhance_telemetry(first_lap).telemetry
-
                 launch = data.loc[: data[data["Speed"] > 200].iloc[0].name]
                 launched_moment = launch.iloc[0]
                 index_launch_began = launched_moment.name
@@ -500,46 +1359,38 @@ def get_all_launches(season):
 @cache_dataset("All_Gearshifts")
 def get_all_gearshifts(season):
     recorded_shifts = []
-    for session in get_all_race_sessions(season):
+    for session in iter_race_sessions(season):
         print(session.info["Meeting"])
-        for driver_identifier, laps in laps_per_driver(session):
-            print(driver_identifier)
-            laps = laps[laps["LapTime"].notnull() & laps["IsAccurate"]]
-
-            for lap_number, lap in laps.iterrows():
-                data = enhance_telemetry(lap).telemetry
-                data["GearDelta"] = data["Gear"].diff(1)
-                # filter to get only samples where gearshift occurs
-                data = data[abs(data["GearDelta"]) > 0]
-                data["Direction"] = data["Delta"].apply(
-                    lambda val: "Up" if val > 0 else "Down"
-                )
-                for index, shift in data.iterrows():
-                    recorded_shifts.append(
-                        dict(
-                            Driver=lap["Driver"],
-                            Team=get_team(season, lap["Driver"]),
-                            Direction=shift["Direction"],
-                            ToGear=shift["Gear"],
-                            AtSpeed=shift["Speed"],
-                            Meeting=session.info["Meeting"],
-                            Lap=lap_number,
-                            Time=shift["Time"],
-                            Distance=shift["Distance"],
-                            LapNumber=lap_number,
-                        )
+        laps = session.laps[session.laps["LapTime"].notnull() & session.laps["IsAccurate"]]
+
+        for lap_number, lap, data in iter_session_telemetry(session, laps):
+            data["GearDelta"] = data["Gear"].diff(1)
+            # filter to get only samples where gearshift occurs
+            data = data[abs(data["GearDelta"]) > 0]
+            data["Direction"] = data["Delta"].apply(
+                lambda val: "Up" if val > 0 else "Down"
+            )
+            for index, shift in data.iterrows():
+                recorded_shifts.append(
+                    dict(
+                        Driver=lap["Driver"],
+                        Team=get_team(season, lap["Driver"]),
+                        Direction=shift["Direction"],
+                        ToGear=shift["Gear"],
+                        AtSpeed=shift["Speed"],
+                        Meeting=session.info["Meeting"],
+                        Lap=lap_number,
+                        Time=shift["Time"],
+                        Distance=shift["Distance"],
+                        LapNumber=lap_number,
                     )
+                )
 
     all_shifts = filter_standin_drivers(pd.DataFrame(recorded_shifts))
     return all_shifts
 
 
-def find_upshifts(lap):
-    try:
-        lap_data = enhance_telemetry(lap).telemetry
-    except:
-        return []
-
+def find_upshifts(lap, lap_data):
     lap_data = lap_data[lap_data["Throttle"] > 95]
     lap_data["GearChange"] = lap_data["Gear"].diff(1).apply(lambda value: value > 0)
 
@@ -561,24 +1412,22 @@ def find_upshifts(lap):
 def get_all_upshifts(season):
     compounds_to_compare = ["SOFT", "MEDIUM", "HARD"]
     recorded_upshifts = []
-    for session in get_all_race_sessions(season):
+    for session in iter_race_sessions(season):
     # for session in get_all_qualifying_sessions(season):
         print(session.info["Meeting"])
-        for driver_identifier, laps in laps_per_driver(session):
-            print(driver_identifier)
-
-            laps = laps[laps["LapTime"].notnull() & laps["IsAccurate"]]
-
-            for lap_index, race_lap in laps.iterrows():
-                if race_lap["Compound"] not in compounds_to_compare:
-                    continue
+        laps = session.laps[
+            session.laps["LapTime"].notnull()
+            & session.laps["IsAccurate"]
+            & session.laps["Compound"].isin(compounds_to_compare)
+        ]
 
-                lap_upshifts = find_upshifts(race_lap)
-                for upshift in lap_upshifts:
-                    upshift["Team"] = get_team(season, upshift["Driver"])
-                    upshift["Meeting"] = session.info["Meeting"]
+        for lap_index, race_lap, lap_data in iter_session_telemetry(session, laps):
+            lap_upshifts = find_upshifts(race_lap, lap_data)
+            for upshift in lap_upshifts:
+                upshift["Team"] = get_team(season, upshift["Driver"])
+                upshift["Meeting"] = session.info["Meeting"]
 
-                recorded_upshifts += lap_upshifts
+            recorded_upshifts += lap_upshifts
 
     all_upshifts = filter_standin_drivers(pd.DataFrame(recorded_upshifts))
     return all_upshifts
@@ -630,9 +1479,10 @@ def get_pre_season_improvements(season):
 @cache_dataset("Racing_Laps")
 def get_all_racing_laps(season, selected_rounds=None):
     all_racing_laps = []
-    for session in get_all_race_sessions(
-        season, selected_rounds=selected_rounds
-    ) + get_all_sprint_sessions(season, selected_rounds=selected_rounds):
+    for session in itertools.chain(
+        iter_race_sessions(season, selected_rounds=selected_rounds),
+        iter_sprint_sessions(season, selected_rounds=selected_rounds),
+    ):
         print(session.info["Meeting"])
         for driver_identifier, laps in laps_per_driver(session):
             print(driver_identifier)
@@ -651,26 +1501,22 @@ def get_all_racing_laps(season, selected_rounds=None):
 @cache_dataset("DRS_Activations")
 def get_DRS_activations(season):
     DRS_activations = []
-    for session in get_all_race_sessions(season):
+    for session in iter_race_sessions(season):
         print(session.info["Meeting"])
-        for driver_identifier, laps in laps_per_driver(session):
-            print(driver_identifier)
-            laps = laps[laps["LapTime"].notnull()]
-            print(driver_identifier)
+        laps = session.laps[session.laps["LapTime"].notnull()]
 
-            for lap_number, lap in laps.iterrows():
-                data = enhance_telemetry(lap).telemetry
-                moments_of_activations = data[
-                    (data["DRS"].diff() > 0) & (data["DRS"] == 14)
-                ]
-                amount_DRS_activations = len(moments_of_activations)
+        for lap_number, lap, data in iter_session_telemetry(session, laps):
+            moments_of_activations = data[
+                (data["DRS"].diff() > 0) & (data["DRS"] == 14)
+            ]
+            amount_DRS_activations = len(moments_of_activations)
 
-                if amount_DRS_activations > 0:
-                    print(lap_number, amount_DRS_activations)
-                    lap["Meeting"] = session.info["Meeting"]
-                    lap["Team"] = get_team(season, driver_identifier)
-                    lap["AmountDRSActivations"] = amount_DRS_activations
-                    DRS_activations.append(lap)
+            if amount_DRS_activations > 0:
+                print(lap_number, amount_DRS_activations)
+                lap["Meeting"] = session.info["Meeting"]
+                lap["Team"] = get_team(season, lap["Driver"])
+                lap["AmountDRSActivations"] = amount_DRS_activations
+                DRS_activations.append(lap)
 
     all_DRS_activations = filter_standin_drivers(pd.DataFrame(DRS_activations))
     return all_DRS_activations
@@ -679,11 +1525,11 @@ def get_DRS_activations(season):
 @cache_dataset("Race_Control_Messages")
 def get_all_race_control_messages(season):
     all_race_control_messages = []
-    for session in (
-        get_all_practice_sessions(season)
-        + get_all_qualifying_sessions(season)
-        + get_all_sprint_sessions(season)
-        + get_all_race_sessions(season)
+    for session in itertools.chain(
+        iter_practice_sessions(season),
+        iter_qualifying_sessions(season),
+        iter_sprint_sessions(season),
+        iter_race_sessions(season),
     ):
         # for session in get_all_race_sessions(season, selected_rounds=[1]):
         base_url = f"http://livetiming.formula1.com"
@@ -774,8 +1620,8 @@ def get_all_pitstop_times(season):
 
 @cache_dataset("Pit_Stop_Laps")
 def get_all_pitstop_laps(season):
-    pitstop_laps = pd.DataFrame()
-    for session in get_all_race_sessions(season):
+    pitstop_laps = []
+    for session in iter_race_sessions(season):
         for driver_identifier, laps in laps_per_driver(session):
             # print(driver_identifier)
             laps.reset_index(inplace=True)
@@ -808,7 +1654,7 @@ def get_all_pitstop_laps(season):
                         next_lap.telemetry[column].iloc[0]
                         - lap.telemetry[column].iloc[-1]
                     )
-                data = lap.telemetry.append(next_lap.telemetry, ignore_index=True)
+                data = pd.concat([lap.telemetry, next_lap.telemetry], ignore_index=True)
 
                 try:
                     time_in_session = lap["LapStartTime"] + data["Time"]
@@ -824,18 +1670,17 @@ def get_all_pitstop_laps(season):
                     print("ERROR ESTABLISHING PITLANE LENGTH")
                     pass
 
-            pitstop_laps = pitstop_laps.append(
-                laps[laps["IsPitting"] & laps["WithTireChange"] & ~laps["IsRedFlag"]],
-                ignore_index=True,
+            pitstop_laps.append(
+                laps[laps["IsPitting"] & laps["WithTireChange"] & ~laps["IsRedFlag"]]
             )
 
-    return filter_standin_drivers(pitstop_laps)
+    return filter_standin_drivers(pd.concat(pitstop_laps, ignore_index=True))
 
 
 @cache_dataset("Pit_Stops")
 def get_all_pitstops(season):
     pitstops = []
-    for session in get_all_race_sessions(season):
+    for session in iter_race_sessions(season):
         amount_laps_completed_by_winner = int(session.results[0]["laps"])
 
         for driver_identifier, laps in laps_per_driver(session):
@@ -882,11 +1727,9 @@ def get_all_pitstops(season):
 def get_Q1_improvements(season):
     efforts = []
     # for qualifying_session in get_all_qualifying_sessions(season):
-    for qualifying_session in get_all_qualifying_sessions(season, selected_rounds=[1]):
-        qualifying_session.laps.dropna(subset=["Time", "LapStartTime"], inplace=True)
-        qualifying_session.laps = qualifying_session.laps[
-            qualifying_session.laps["IsAccurate"]
-        ]
+    for qualifying_session in iter_qualifying_sessions(season, selected_rounds=[1]):
+        session_laps = qualifying_session.laps.dropna(subset=["Time", "LapStartTime"])
+        session_laps = session_laps[session_laps["IsAccurate"]].copy()
         subsession_finished_times = qualifying_session.session_status[
             qualifying_session.session_status["Status"] == "Finished"
         ]
@@ -896,9 +1739,7 @@ def get_Q1_improvements(season):
                     qualifying_session.session_status["Status"] == "Finalised"
                 ].iloc[0]
             )
-        qualifying_session.laps["SubSession"] = qualifying_session.laps[
-            "LapStartTime"
-        ].apply(
+        session_laps["SubSession"] = session_laps["LapStartTime"].apply(
             lambda lap_start_time: ["Q3", "Q2", "Q1"][
                 len(
                     subsession_finished_times.loc[
@@ -909,7 +1750,7 @@ def get_Q1_improvements(season):
             ]
         )
 
-        for driver_identifier, laps in laps_per_driver(qualifying_session):
+        for driver_identifier, laps in session_laps.groupby("Driver"):
             # print(laps[["Time", "LapNumber", "Driver", "ReadableLapTime", "LapStartTime", "SubSession"]].to_string())
             # find first representative Q1 lap that is within the 3% threshold of the fastest Q1 lap
             q1_laps = laps[laps["SubSession"] == "Q1"].pick_quicklaps(threshold=1.03)
@@ -934,67 +1775,61 @@ def get_Q1_improvements(season):
 def get_downshift_rates(season):
     shift_sequences = []
     # for session in get_all_qualifying_sessions(season, selected_rounds=[1]):
-    for session in get_all_qualifying_sessions(season):
+    for session in iter_qualifying_sessions(season):
         print(session.info["Meeting"])
+        quick_laps = []
         for driver_identifier, laps in laps_per_driver(session):
-            print(driver_identifier)
             laps = laps[laps["LapTime"].notnull() & laps["IsAccurate"]].pick_quicklaps(
                 threshold=1.03
             )
+            quick_laps += list(laps.index)
 
-            for lap_number, lap in laps.iterrows():
-                try:
-                    data = enhance_telemetry(lap).telemetry
-                except:
-                    continue
-                data["GearDelta"] = data["Gear"].diff(1)
-                grouping = data.groupby((data["Throttle"].diff(1) < 0).cumsum())
-                for _, window in grouping:
-                    downshifts = window[window["GearDelta"] < 0]
-                    if len(downshifts) > 1:
-                        first_downshift, last_downshift = (
-                            downshifts.iloc[0],
-                            downshifts.iloc[-1],
-                        )
-                        from_gear, to_gear = (
-                            first_downshift["Gear"] + 1,
-                            last_downshift["Gear"],
-                        )
-                        amount_downshifts = from_gear - to_gear
-                        shift_sequences.append(
-                            dict(
-                                Driver=lap["Driver"],
-                                Team=get_team(season, lap["Driver"]),
-                                FromGear=from_gear,
-                                ToGear=to_gear,
-                                Meeting=session.info["Meeting"],
-                                Lap=lap_number,
-                                TimeTaken=(
-                                    last_downshift["TimeInSeconds"]
-                                    - first_downshift["TimeInSeconds"]
-                                )
-                                / amount_downshifts,
-                                LapNumber=lap_number,
+        for lap_number, lap, data in iter_session_telemetry(
+            session, session.laps.loc[quick_laps]
+        ):
+            data["GearDelta"] = data["Gear"].diff(1)
+            grouping = data.groupby((data["Throttle"].diff(1) < 0).cumsum())
+            for _, window in grouping:
+                downshifts = window[window["GearDelta"] < 0]
+                if len(downshifts) > 1:
+                    first_downshift, last_downshift = (
+                        downshifts.iloc[0],
+                        downshifts.iloc[-1],
+                    )
+                    from_gear, to_gear = (
+                        first_downshift["Gear"] + 1,
+                        last_downshift["Gear"],
+                    )
+                    amount_downshifts = from_gear - to_gear
+                    shift_sequences.append(
+                        dict(
+                            Driver=lap["Driver"],
+                            Team=get_team(season, lap["Driver"]),
+                            FromGear=from_gear,
+                            ToGear=to_gear,
+                            Meeting=session.info["Meeting"],
+                            Lap=lap_number,
+                            TimeTaken=(
+                                last_downshift["TimeInSeconds"]
+                                - first_downshift["TimeInSeconds"]
                             )
+                            / amount_downshifts,
+                            LapNumber=lap_number,
                         )
+                    )
 
     downshift_rates = filter_standin_drivers(pd.DataFrame(shift_sequences))
     return downshift_rates
 
 
 def cache_tracks(season):
-    for session in get_all_qualifying_sessions(season) + get_all_testing_sessions(season):
-        track_cache_path = os.path.join(
-            cache_directory,
-            "tracks",
-            session.cache_name + "_Track.pkl",
-        )
-        print(track_cache_path)
-
+    for session in itertools.chain(iter_qualifying_sessions(season), iter_testing_sessions(season)):
         try:
+            track_name = get_track_name(season, session.info["Meeting"])
             lap = enhance_telemetry(session.laps.pick_fastest())
         except:
             continue
+        print(track_name)
 
         alpha = np.linspace(0, 1, round(len(lap.telemetry)))
         try:
@@ -1005,27 +1840,26 @@ def cache_tracks(season):
                 )
             )
             distance /= distance[-1]
-            fx, fy = interp1d(
+            fx, fy = interpolate.interp1d(
                 distance, lap.telemetry["X"], fill_value="extrapolate",
-            ), interp1d(
+            ), interpolate.interp1d(
                 distance, lap.telemetry["Y"], fill_value="extrapolate",
             )
             track = pd.DataFrame(dict(Distance=range(len(alpha)), PercentageCompleted=distance, X=fx(alpha), Y=fy(alpha)))
         except:
             print("INVALID GPS ON LAP")
+            continue
 
-        track.to_pickle(track_cache_path)
+        track_store.put(track_name, track)
 
 # cache_tracks(2022)
 
 def show_track(season, selected_round):
-    for session in get_all_race_sessions(season, selected_rounds=[selected_round]):
-        track_cache_path = os.path.join(
-            cache_directory,
-            "tracks",
-            session.cache_name + "_Track.pkl",
-        )
-        track = pd.read_pickle(track_cache_path)
+    from matplotlib import pyplot as plt
+
+    apply_style()
+    for session in iter_race_sessions(season, selected_rounds=[selected_round]):
+        track = get_track_geometry(season, session.info["Meeting"]).track
         fig, ax = plt.subplots(figsize=(12, 18), dpi=200)
         ax.scatter(
             track["X"],
@@ -1080,56 +1914,88 @@ def show_track(season, selected_round):
         fig.tight_layout()
         fig.savefig("tests/Track.png")
 
+# track points a lap may move between samples before its nearest track point is considered a jump
+SECTION_TIMES_WINDOW = 20
+
+
+def get_session_section_times(session, window=SECTION_TIMES_WINDOW):
+    # the accurate laps of the session with telemetry, their (lap x section) time matrix
+    # and the name of each section
+    season, meeting = session.info["Season"], session.info["Meeting"]
+    track_geometry = get_track_geometry(season, meeting)
+    track_index, section_index = track_geometry.index, track_geometry.sections
+    laps = session.laps[session.laps["IsAccurate"]]
+
+    lap_indices, progress, times, lengths = [], [], [], []
+    for lap_index, lap, data in iter_session_telemetry(session, laps):
+        locations = track_index.locate(data["X"], data["Y"], window=window)
+        lap_indices.append(lap_index)
+        progress.append(locations / len(track_index.points) * 100)
+        times.append(data["TimeInSeconds"].to_numpy())
+        lengths.append(len(data))
+
+    if not lap_indices:
+        return laps.iloc[:0], np.empty((0, len(section_index.names))), section_index.names
+    section_times = compute_section_times(
+        np.concatenate(progress),
+        np.concatenate(times),
+        np.array(lengths),
+        section_index.boundaries,
+    )
+    return laps.loc[lap_indices], section_times, section_index.names
+
+
 @cache_dataset("Session_Section_Times")
 def get_section_times(season):
     laps_sections = []
-    # for session in get_all_testing_sessions(season) + get_all_practice_sessions(season) + get_all_qualifying_sessions(season) + get_all_sprint_sessions(season) + get_all_race_sessions(season):
-    # for session in get_all_qualifying_sessions(season, selected_rounds=[1]):
-    # for session in get_all_testing_sessions(season):
-    # for session in get_all_qualifying_sessions(season):
-    for session in [get_session(season, "Saudi Arabian Grand Prix", "Practice 2")]:
-        for lap_index, lap in session.laps[session.laps["IsAccurate"]].iterrows():
-            # print(lap.telemetry[["Distance", "Speed", "Location", "Section", "SectionChanges"]].to_string())
-            try:
-                lap = enhance_telemetry(lap)
-            except:
-                print("Lap telemetry not available")
-                continue
-            lap = add_track_locations(lap)
-            lap.telemetry["SectionChanges"] = (lap.telemetry["Section"] != lap.telemetry["Section"].shift()).cumsum()
-            section_times = dict()
-            # print(lap.telemetry["SectionChanges"].unique())
-            for _, data in lap.telemetry.groupby("SectionChanges"):
-                section_name = data.iloc[0]["Section"]
-                section_time = data.iloc[-1]["TimeInSeconds"] - data.iloc[0]["TimeInSeconds"]
-                section_times[section_name] = section_times.get(section_name, 0) + section_time
-            for index, (section_name, section_time) in enumerate(section_times.items()):
-                laps_sections.append(dict(
+    for session in itertools.chain(
+        iter_testing_sessions(season),
+        iter_practice_sessions(season),
+        iter_qualifying_sessions(season),
+        iter_sprint_sessions(season),
+        iter_race_sessions(season),
+    ):
+        try:
+            laps, section_times, section_names = get_session_section_times(session)
+        except:
+            print("SECTION TIMES NOT AVAILABLE")
+            continue
+        # one entry per section name, in the order the lap reaches them, with the time of every
+        # stretch of the lap carrying that name summed (unnamed stretches all count towards "")
+        names = list(dict.fromkeys(section_names))
+        section_times = section_times @ (
+            np.array(section_names)[:, None] == np.array(names)[None, :]
+        )
+        amount_laps, amount_sections = section_times.shape
+        laps_sections.append(
+            pd.DataFrame(
+                dict(
                     Meeting=session.info["Meeting"],
                     Session=session.info["Session"],
-                    LapNumber=lap["LapNumber"],
-                    LapIndex=lap_index,
-                    Driver=lap["Driver"],
-                    SectionNumber=index,
-                    SectionName=section_name,
-                    Time=section_time,
-                ))
+                    LapNumber=np.repeat(laps["LapNumber"].to_numpy(), amount_sections),
+                    LapIndex=np.repeat(laps.index.to_numpy(), amount_sections),
+                    Driver=np.repeat(laps["Driver"].to_numpy(), amount_sections),
+                    SectionNumber=np.tile(np.arange(amount_sections), amount_laps),
+                    SectionName=np.tile(names, amount_laps),
+                    Time=section_times.ravel(),
+                )
+            )
+        )
+        print(amount_laps * amount_sections, "entries")
+
+    return pd.concat(laps_sections, ignore_index=True) if laps_sections else pd.DataFrame()
 
-        print(len(laps_sections), "entries")
-    return pd.DataFrame(laps_sections)
 
 def get_brakings(season, meeting, lap, turn):
+    from matplotlib import pyplot as plt
+
+    apply_style()
     session = get_session(season, meeting, "R")
-    track_cache_path = os.path.join(
-        cache_directory,
-        "tracks",
-        session.cache_name + "_Track.pkl",
-    )
-    aggregate_track = pd.read_pickle(track_cache_path)
+    aggregate_track = get_track_geometry(season, session.info["Meeting"]).track
     fig, (ax1, ax2) = plt.subplots(nrows=2, figsize=(16, 9), dpi=150)
     ax1.plot(aggregate_track["X"], aggregate_track["Y"], linewidth=15, alpha=0.8)
 
-    braking_points = pd.DataFrame()
+    braking_points = []
     for driver_identifier, laps in laps_per_driver(session):
         try:
             lap = enhance_telemetry(laps.pick_fastest())
@@ -1137,7 +2003,7 @@ def get_brakings(season, meeting, lap, turn):
             continue
 
         acceleration = pd.Series(
-            savgol_filter(
+            signal.savgol_filter(
                 np.gradient(lap.telemetry["Speed"]), window_length=15, polyorder=1
             )
         )
@@ -1146,7 +2012,7 @@ def get_brakings(season, meeting, lap, turn):
         # print(lap.telemetry["IsBraking"])
 
         first_sample_braking = braking_zones.iloc[0]
-        closest_sample = cdist(
+        closest_sample = spatial.distance.cdist(
             [(first_sample_braking["X"], first_sample_braking["Y"])], aggregate_track
         ).argmin()
         closest_coordinates = aggregate_track[closest_sample]
@@ -1169,7 +2035,7 @@ def get_brakings(season, meeting, lap, turn):
             "first braking",
             first_sample_braking[["TimeInSeconds", "Distance", "Speed", "Brake"]],
         )
-        braking_points = braking_points.append(
+        braking_points.append(
             dict(
                 Driver=driver_identifier,
                 BrakingLocation=closest_sample,
@@ -1177,10 +2043,10 @@ def get_brakings(season, meeting, lap, turn):
                 X=closest_coordinates[0],
                 Y=closest_coordinates[1],
                 Color=get_driver_color(season, driver_identifier),
-            ),
-            ignore_index=True,
+            )
         )
 
+    braking_points = pd.DataFrame(braking_points)
     ax1.plot(
         [braking_points["X"].median()],
         [braking_points["Y"].median()],
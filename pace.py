@@ -0,0 +1,231 @@
+import altair as alt
+from views import *
+
+
+class PaceAnalysis:
+    def __init__(self, season, meeting, session):
+        session = get_session(season, meeting, session)
+
+        source = session.laps.copy()
+
+        source["Day"] = (
+            source["LapStartDate"]
+            .dt.day.fillna(0)
+            .apply(lambda day_of_month: {10: 1, 11: 2, 12: 3}.get(int(day_of_month), 0))
+        )
+        source["TimeOfDay"] = (
+            source["Time"]
+            .dt.total_seconds()
+            .apply(
+                lambda secs: f"{int(secs // 3600):02d}:{int(secs % 3600) // 60:02d}:{int(secs % 3600) % 60:02d}"
+            )
+        )
+        source["Time"] = source["Time"].dt.total_seconds()
+        source["LapTime"] = source["LapTime"].dt.total_seconds()
+        source["Compound"] = source["Compound"].str.capitalize()
+        # source = source[source["IsAccurate"]]
+        source["Stint"] = source.groupby("Driver")["PitOutTime"].transform(
+            lambda group: (~group.isnull()).cumsum()
+        )
+        source = (
+            source.groupby(["Driver", "Stint"])
+            .apply(lambda group: group.iloc[1:-1])
+            .reset_index(drop=True)
+        )
+        source["StintLength"] = (
+            source.groupby(["Driver", "Stint"])["LapNumber"].transform(len).fillna(1)
+        )
+        min_stint_length_for_long_run = 5
+        source = source[(source["StintLength"] - 3) > min_stint_length_for_long_run]
+        source["Label"] = source.apply(
+            lambda row: f"""{row["Driver"]} R{int(row["Stint"])} {row["Compound"]} ({int(row["StintLength"])})""",
+            axis=1,
+        )
+        source["LapNumber"] = source.groupby("Label")["LapNumber"].transform(
+            lambda group: group - group.min()
+        )
+        source = source[
+            [
+                "Day",
+                "TimeOfDay",
+                "Time",
+                "Driver",
+                "LapNumber",
+                "LapTime",
+                "ReadableLapTime",
+                "Color",
+                "Compound",
+                "TyreLife",
+                "FreshTyre",
+                "SpeedST",
+                "Stint",
+                "StintLength",
+                "Label",
+            ]
+        ]
+        # print(source[["Time", "LapNumber", "Driver", "ReadableLapTime", "Stint", "StintLength", "Label"]])
+
+        # source["CumLapTime"] = source.groupby("Driver")["LapTime"].cumsum()
+        # winner = source.loc[
+        #     source[source["LapNumber"] == source["LapNumber"].max()]["Time"].idxmin()
+        # ]["Driver"]
+        # source["RaceTime"] = (
+        #     source.groupby("LapNumber")
+        #     .apply(lambda g: g["Time"] - g[g["Driver"] == winner].iloc[0]["Time"])
+        #     .reset_index(level=0)[0]
+        # )
+        # source["ComparativeLapTime"] = (
+        #     source.groupby("LapNumber")
+        #     .apply(lambda g: g["LapTime"] - g["LapTime"].median())
+        #     .reset_index(level=0)[0]
+        # )
+
+        group_by = "Label"
+
+        # comparison_column = "RaceTime:Q"
+        # comparison_column = "SpeedST:Q"
+        comparison_column = "LapTime:Q"
+
+        color_mapping = {
+            label: get_driver_color(season, label[:3])
+            for label in source["Label"].values
+        }
+
+        nearest_lap = alt.selection(
+            type="single",
+            nearest=True,
+            on="mouseover",
+            fields=["LapNumber"],
+            empty="none",
+        )
+        driver_selection = alt.selection_multi(fields=[group_by], empty="none")
+
+        colors = alt.condition(
+            driver_selection,
+            alt.Color(
+                f"{group_by}:N",
+                scale=alt.Scale(
+                    domain=list(color_mapping.keys()),
+                    range=list(color_mapping.values()),
+                ),
+                legend=None,
+            ),
+            alt.value(LIGHT_COLOR),
+        )
+
+        line = (
+            alt.Chart(source)
+            .mark_line(interpolate="monotone")
+            .encode(
+                x=alt.X("LapNumber:Q", scale=alt.Scale(padding=0, nice=False)),
+                y=alt.Y(
+                    comparison_column,
+                    axis=alt.Axis(tickCount=15),
+                    scale={
+                        "LapTime:Q": alt.Scale(
+                            zero=False,
+                            domain=(
+                                source["LapTime"].min(),
+                                source["LapTime"].median() + 4,
+                            ),
+                            clamp=True,
+                        ),
+                        # "RaceTime:Q": alt.Scale(),
+                        # "ComparativeLapTime:Q": alt.Scale(domain=(-5, 5), clamp=True),
+                        # "SpeedST:Q": alt.Scale(
+                        #     zero=False,
+                        #     domain=(
+                        #         source["SpeedST"].median() - 20,
+                        #         source["SpeedST"].median() + 20,
+                        #     ),
+                        # ),
+                    }[comparison_column],
+                ),
+                tooltip=[
+                    "Day",
+                    "TimeOfDay",
+                    "LapNumber",
+                    "Driver",
+                    "ReadableLapTime",
+                    "Compound",
+                    "Stint",
+                    "TyreLife",
+                    "SpeedST",
+                ],
+                color=colors,
+                opacity=alt.condition(driver_selection, alt.value(1.0), alt.value(0.1)),
+            )
+        )
+
+        # Transparent selectors across the chart. This is what tells us the x-value of the cursor
+        selectors = (
+            alt.Chart(source)
+            .mark_point()
+            .encode(
+                x=alt.X("LapNumber:Q", scale=alt.Scale(padding=0)),
+                opacity=alt.value(0),
+            )
+            .add_selection(nearest_lap)
+        )
+
+        legend = (
+            alt.Chart(source)
+            .mark_point(size=100)
+            .encode(x=alt.X(f"{group_by}:N", axis=alt.Axis(title="")), color=colors)
+            .add_selection(driver_selection)
+        )
+
+        # Draw points on the line, and highlight based on selection
+        points = line.mark_point().encode(
+            opacity=alt.condition(
+                driver_selection,
+                alt.value(1),
+                alt.value(0),
+            )
+        )
+
+        # text = points.mark_text(align="left", dx=5, dy=-5).encode(
+        #     text=alt.condition(nearest_lap, "ReadableLapTime", alt.value(" ")),
+        # )
+
+        # Draw a rule at the location of the selection
+        rules = (
+            alt.Chart(source)
+            .mark_rule(color=LIGHT_COLOR)
+            .encode(
+                x="LapNumber:Q",
+            )
+            .transform_filter(nearest_lap)
+        )
+
+        # Put the five layers into a chart and bind the data
+        chart = (
+            alt.layer(
+                line,
+                selectors,
+                points,
+                rules,
+            )
+            .properties(
+                title=f"""{session.info["Season"]} {session.info["Meeting"]} - Pace Overview""",
+                width=2200,
+                height=1220,
+            )
+            .interactive()
+        )
+
+        window = (
+            alt.vconcat(
+                chart,
+                legend,
+            )
+            .configure(background=BACKGROUND_COLOR, padding=0, font="Roboto")
+            .configure_axis(gridOpacity=0.15)
+            .configure_view(strokeWidth=0)
+        )
+
+        alt.themes.enable("dark")
+        # alt.renderers.enable("mimetype")
+
+        # window.save("chart.html")
+        window.show()
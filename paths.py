@@ -10,6 +10,8 @@ cache_directory = "caches"
 
 telemetry_cache_directory = os.path.join(cache_directory, "telemetry")
 laps_cache_directory = os.path.join(cache_directory, "laps")
+tracks_cache_directory = os.path.join(cache_directory, "tracks")
+warehouse_directory = os.path.join(cache_directory, "warehouse")
 
 f1_logo_path = os.path.join(package_directory, "assets", "images", "f1_logo.png")
 d_logo_path = os.path.join(package_directory, "assets", "images", "d_logo_2021.png")
@@ -1,5 +1,3 @@
-from matplotlib import pyplot as plt
-
 TRACE_THICKNESS = 0.8
 
 BACKGROUND_COLOR = "#050505"
@@ -17,42 +15,46 @@ class DATA_COLORS:
     BLUE = "#00ACED"
     YELLOW = "#FFFF00"
 
-plt.rcParams["figure.dpi"] = 300
-plt.rcParams["savefig.dpi"] = 200
-plt.rcParams["animation.embed_limit"] = 1000
-plt.rcParams["svg.fonttype"] = "none"
-plt.rcParams["figure.frameon"] = False
-plt.rcParams["figure.facecolor"] = BACKGROUND_COLOR
-plt.rcParams["figure.titlesize"] = 22
-plt.rcParams["axes.spines.left"] = True
-plt.rcParams["axes.spines.bottom"] = False
-plt.rcParams["axes.spines.right"] = True
-plt.rcParams["axes.spines.top"] = False
-plt.rcParams["axes.edgecolor"] = LIGHT_COLOR
-plt.rcParams["axes.labelweight"] = "regular"
-plt.rcParams["axes.labelcolor"] = LIGHT_COLOR
-plt.rcParams["axes.facecolor"] = BACKGROUND_COLOR
-plt.rcParams["axes.titlesize"] = "small"
-plt.rcParams["axes.labelsize"] = "small"
-plt.rcParams["axes.labelpad"] = 10
-plt.rcParams["axes.titlepad"] = 10
-plt.rcParams["axes.xmargin"] = 0
-plt.rcParams["axes.ymargin"] = 0
-plt.rcParams["grid.color"] = GRID_COLOR
-plt.rcParams["grid.linewidth"] = 0.1
-plt.rcParams["text.color"] = LIGHT_COLOR
-plt.rcParams["font.family"] = "Roboto"
-plt.rcParams["font.size"] = 8
-plt.rcParams["font.weight"] = 700
-plt.rcParams["xtick.color"] = LIGHT_COLOR
-plt.rcParams["xtick.labelsize"] = "xx-small"
-plt.rcParams["ytick.color"] = LIGHT_COLOR
-plt.rcParams["ytick.labelsize"] = "xx-small"
-plt.rcParams["legend.fontsize"] = "x-large"
-plt.rcParams["legend.facecolor"] = BACKGROUND_COLOR
-plt.rcParams["legend.edgecolor"] = BACKGROUND_COLOR
-plt.rcParams["boxplot.boxprops.color"] = LIGHT_COLOR
-plt.rcParams["boxplot.whiskerprops.color"] = LIGHT_COLOR
-plt.rcParams["boxplot.capprops.color"] = LIGHT_COLOR
-plt.rcParams["boxplot.medianprops.color"] = LIGHT_COLOR
-plt.rcParams["boxplot.flierprops.markeredgecolor"] = LIGHT_COLOR
+def apply_style():
+    # only done by the modules that draw, as it imports matplotlib
+    import matplotlib
+
+    matplotlib.rcParams["figure.dpi"] = 300
+    matplotlib.rcParams["savefig.dpi"] = 200
+    matplotlib.rcParams["animation.embed_limit"] = 1000
+    matplotlib.rcParams["svg.fonttype"] = "none"
+    matplotlib.rcParams["figure.frameon"] = False
+    matplotlib.rcParams["figure.facecolor"] = BACKGROUND_COLOR
+    matplotlib.rcParams["figure.titlesize"] = 22
+    matplotlib.rcParams["axes.spines.left"] = True
+    matplotlib.rcParams["axes.spines.bottom"] = False
+    matplotlib.rcParams["axes.spines.right"] = True
+    matplotlib.rcParams["axes.spines.top"] = False
+    matplotlib.rcParams["axes.edgecolor"] = LIGHT_COLOR
+    matplotlib.rcParams["axes.labelweight"] = "regular"
+    matplotlib.rcParams["axes.labelcolor"] = LIGHT_COLOR
+    matplotlib.rcParams["axes.facecolor"] = BACKGROUND_COLOR
+    matplotlib.rcParams["axes.titlesize"] = "small"
+    matplotlib.rcParams["axes.labelsize"] = "small"
+    matplotlib.rcParams["axes.labelpad"] = 10
+    matplotlib.rcParams["axes.titlepad"] = 10
+    matplotlib.rcParams["axes.xmargin"] = 0
+    matplotlib.rcParams["axes.ymargin"] = 0
+    matplotlib.rcParams["grid.color"] = GRID_COLOR
+    matplotlib.rcParams["grid.linewidth"] = 0.1
+    matplotlib.rcParams["text.color"] = LIGHT_COLOR
+    matplotlib.rcParams["font.family"] = "Roboto"
+    matplotlib.rcParams["font.size"] = 8
+    matplotlib.rcParams["font.weight"] = 700
+    matplotlib.rcParams["xtick.color"] = LIGHT_COLOR
+    matplotlib.rcParams["xtick.labelsize"] = "xx-small"
+    matplotlib.rcParams["ytick.color"] = LIGHT_COLOR
+    matplotlib.rcParams["ytick.labelsize"] = "xx-small"
+    matplotlib.rcParams["legend.fontsize"] = "x-large"
+    matplotlib.rcParams["legend.facecolor"] = BACKGROUND_COLOR
+    matplotlib.rcParams["legend.edgecolor"] = BACKGROUND_COLOR
+    matplotlib.rcParams["boxplot.boxprops.color"] = LIGHT_COLOR
+    matplotlib.rcParams["boxplot.whiskerprops.color"] = LIGHT_COLOR
+    matplotlib.rcParams["boxplot.capprops.color"] = LIGHT_COLOR
+    matplotlib.rcParams["boxplot.medianprops.color"] = LIGHT_COLOR
+    matplotlib.rcParams["boxplot.flierprops.markeredgecolor"] = LIGHT_COLOR
@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import pandas
+
+from getters import *
+from warehouse import *
+from views import DatasetRegistry
+
+
+def make_dataset():
+    # meetings in calendar rather than alphabetical order, with Meeting not the last column
+    return pandas.DataFrame(
+        dict(
+            Driver=["VER", "HAM", "VER", "HAM", "LEC", "VER"],
+            Meeting=[
+                "Bahrain Grand Prix",
+                "Bahrain Grand Prix",
+                "Emilia Romagna Grand Prix",
+                "Portuguese Grand Prix",
+                "Emilia Romagna Grand Prix",
+                "Abu Dhabi Grand Prix",
+            ],
+            LapNumber=[1, 1, 2, 3, 2, 58],
+            RPM=[11200.0, 11050.0, 11500.0, 10900.0, 11300.0, 11800.0],
+        )
+    )
+
+
+class CacheDirectoryTestCase(unittest.TestCase):
+    def setUp(self):
+        # datasets are cached relative to the working directory
+        self.working_directory = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        os.makedirs(cache_directory)
+
+    def tearDown(self):
+        os.chdir(self.working_directory)
+        shutil.rmtree(self.directory)
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestDatasetCache(CacheDirectoryTestCase):
+
+    def test_round_trip_keeps_row_and_column_order(self):
+        dataset = make_dataset()
+        cache_path = write_dataset(dataset, os.path.join(cache_directory, "2021_Test"))
+        pandas.testing.assert_frame_equal(read_dataset(cache_path), dataset)
+
+    def test_round_trip_keeps_index(self):
+        dataset = make_dataset().set_index(numpy.array([7, 3, 11, 0, 5, 2]))
+        cache_path = write_dataset(dataset, os.path.join(cache_directory, "2021_Test"))
+        pandas.testing.assert_frame_equal(read_dataset(cache_path), dataset)
+
+    def test_projection_keeps_row_order(self):
+        dataset = make_dataset()
+        cache_path = write_dataset(dataset, os.path.join(cache_directory, "2021_Test"))
+        filters = [("Meeting", "in", ["Portuguese Grand Prix", "Emilia Romagna Grand Prix"])]
+        expected = filter_dataset(dataset, filters)[["RPM", "Driver"]]
+        pandas.testing.assert_frame_equal(
+            read_dataset(cache_path, ["RPM", "Driver"], filters), expected
+        )
+
+    def test_chunked_round_trip_keeps_row_and_column_order(self):
+        dataset = make_dataset()
+        chunked_dataset = ChunkedDataset(flush_every=2)
+        for _, row in dataset.iterrows():
+            chunked_dataset.append(row.to_frame().T.astype(dataset.dtypes))
+        cache_path = write_dataset(chunked_dataset, os.path.join(cache_directory, "2021_Test"))
+        chunked_dataset.close()
+        pandas.testing.assert_frame_equal(read_dataset(cache_path), dataset)
+
+
+
+
+class TestDatasetRegistry(unittest.TestCase):
+    def test_projections_are_served_from_a_full_read(self):
+        calls = []
+
+        def get_dataset(season, columns=None, filters=None):
+            calls.append((columns, filters))
+            dataset = filter_dataset(make_dataset(), filters)
+            return dataset if columns is None else dataset[columns]
+
+        registry = DatasetRegistry()
+        dataset = registry.get(get_dataset, 2021)
+        projection = registry.get(get_dataset, 2021, columns=["Driver", "RPM"])
+        selection = registry.get(get_dataset, 2021, filters=[("Driver", "==", "VER")])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((registry.hits, registry.misses), (2, 1))
+        pandas.testing.assert_frame_equal(dataset, make_dataset())
+        pandas.testing.assert_frame_equal(projection, make_dataset()[["Driver", "RPM"]])
+        self.assertEqual(selection["Driver"].unique().tolist(), ["VER"])
+
+    def test_datasets_are_handed_out_as_copies(self):
+        registry = DatasetRegistry()
+        registry.get(lambda season: make_dataset(), 2021)["RPM"] = 0
+        self.assertTrue((registry.get(lambda season: make_dataset(), 2021)["RPM"] > 0).all())
+def make_race_control_messages(meeting, flags):
+    return pandas.DataFrame(
+        dict(
+            Message=[f"message {index}" for index in range(len(flags))],
+            Flag=flags,
+            Driver=["HAM", "VER", "HAM"][: len(flags)],
+            Meeting=meeting,
+        )
+    )
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestWarehouse(CacheDirectoryTestCase):
+    def test_partitions_of_differing_types_read_as_one_dataset(self):
+        # Flag is all missing in one meeting, so that partition infers it as a null column
+        partitions = [
+            make_race_control_messages("Emilia Romagna Grand Prix", ["GREEN", "YELLOW", "RED"]),
+            make_race_control_messages("Bahrain Grand Prix", [None, None]),
+        ]
+        for partition in partitions:
+            write_partition(partition, 2021, "Race_Control_Messages", partition["Meeting"].iloc[0])
+
+        dataset = get_warehouse_dataset(2021, "Race_Control_Messages")
+        self.assertEqual(
+            list(dataset["Meeting"].unique()), ["Bahrain Grand Prix", "Emilia Romagna Grand Prix"]
+        )
+        self.assertEqual(dataset["Flag"].tolist()[2:], ["GREEN", "YELLOW", "RED"])
+        self.assertTrue(dataset["Flag"].iloc[:2].isnull().all())
+        self.assertEqual(
+            dataset["Team"].tolist(), [get_team(2021, driver) for driver in dataset["Driver"]]
+        )
+
+        selected = get_warehouse_dataset(
+            2021,
+            "Race_Control_Messages",
+            columns=["Flag", "Team"],
+            filters=[("Meeting", "==", "Emilia Romagna Grand Prix")],
+        )
+        self.assertEqual(list(selected.columns), ["Flag", "Team"])
+        self.assertEqual(selected["Flag"].tolist(), ["GREEN", "YELLOW", "RED"])
+
+    def test_getter_reads_warehouse_once_season_is_ingested(self):
+        calls = []
+
+        def get_all_race_control_messages(season, columns=None, filters=None):
+            calls.append(season)
+            return make_race_control_messages("Bahrain Grand Prix", ["GREEN"])
+
+        getter = get_warehouse_getter(get_all_race_control_messages)
+        getter(2021)
+        meeting = "Bahrain Grand Prix"
+        write_partition(
+            make_race_control_messages(meeting, ["RED"]), 2021, "Race_Control_Messages", meeting
+        )
+        set_manifest(2021, dict(Race_Control_Messages={meeting: dict()}))
+        self.assertEqual(getter(2021, columns=["Flag"])["Flag"].tolist(), ["RED"])
+        self.assertEqual(calls, [2021])
+
+    def test_dataset_never_ingested(self):
+        with self.assertRaises(FileNotFoundError):
+            get_warehouse_dataset(2021, "Race_Control_Messages")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+# cold-start latency of the modules CLI jobs import, each measured in a fresh interpreter
+# with the interpreter's own startup subtracted: python tests/import_benchmark.py [module ...]
+package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["getters", "warehouse", "views", "aggregations", "dispatcher"]
+RUNS = 5
+
+
+def measure_command(command):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", command], cwd=package_directory, check=True)
+    return time.perf_counter() - start
+
+
+def measure_import(module, runs=RUNS):
+    return statistics.median(measure_command(f"import {module}") for _ in range(runs))
+
+
+def get_slowest_imports(module, amount=8):
+    # the imports taking the longest, including what they import themselves, as
+    # (microseconds, module name) from python -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=package_directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        fields = line[len("import time:") :].split("|")
+        if line.startswith("import time:") and fields[1].strip().isdigit():
+            timings.append((int(fields[1]), fields[2].strip()))
+    return sorted(timings, reverse=True)[1 : amount + 1]
+
+
+if __name__ == "__main__":
+    startup = statistics.median(measure_command("pass") for _ in range(RUNS))
+    print(f"interpreter startup {startup * 1000:.0f} ms")
+    for module in sys.argv[1:] or MODULES:
+        print(f"import {module} {(measure_import(module) - startup) * 1000:.0f} ms")
+        for microseconds, name in get_slowest_imports(module):
+            print(f"    {microseconds / 1000:8.0f} ms  {name}")
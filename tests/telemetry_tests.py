@@ -0,0 +1,124 @@
+import unittest
+import numpy
+import pandas
+from scipy.interpolate import interp1d
+from scipy.signal import savgol_filter
+
+from getters import *
+
+
+def make_telemetry(samples=240, seed=0):
+    # a lap of merged telemetry sampled at irregular intervals, as fastf1 returns it
+    generator = numpy.random.default_rng(seed)
+    time = numpy.cumsum(generator.uniform(0.15, 0.3, samples))
+    speed = 200 + 80 * numpy.sin(time / 5) + generator.normal(0, 2, samples)
+    return pandas.DataFrame(
+        dict(
+            Distance=numpy.cumsum(speed / 3.6 * numpy.diff(time, prepend=0)),
+            Time=pandas.to_timedelta(time, unit="s"),
+            Speed=speed,
+            RPM=10500 + 1500 * numpy.sin(time / 3),
+            nGear=numpy.clip(numpy.round(speed / 40), 1, 8),
+            Throttle=numpy.clip(generator.normal(80, 30, samples), 0, 100),
+            Brake=generator.uniform(0, 1, samples) > 0.8,
+            DRS=generator.choice([0, 8, 12], samples),
+            X=1000 * numpy.cos(time / 20) + generator.normal(0, 1, samples),
+            Y=1000 * numpy.sin(time / 20) + generator.normal(0, 1, samples),
+            Z=generator.normal(50, 1, samples),
+        )
+    )
+
+
+def reference_resample(telemetry):
+    # the per-column savgol_filter and interp1d resampling resample_telemetry replaced
+    telemetry = telemetry.rename(columns=dict(nGear="Gear")).reset_index(drop=True)
+    telemetry["TimeInSeconds"] = telemetry["Time"].dt.total_seconds()
+    for column in ["Distance", "TimeInSeconds", "Speed", "Throttle", "X", "Y", "Z"]:
+        telemetry[column] = savgol_filter(telemetry[column], window_length=7, polyorder=1)
+
+    resampled = pandas.DataFrame()
+    new_index = range(round(telemetry.iloc[-1]["Distance"]))
+    for column in RESAMPLED_CHANNELS:
+        interp = interp1d(
+            telemetry["Distance"], telemetry[column].astype(float), fill_value="extrapolate"
+        )
+        resampled[column] = interp(new_index)
+    resampled["Gear"] = resampled["Gear"].round()
+    resampled.loc[0, "TimeInSeconds"] = 0
+    return resampled
+
+
+def get_lap_samples(telemetry):
+    return numpy.column_stack(
+        [telemetry["Distance"].to_numpy(dtype=float), telemetry["Time"].dt.total_seconds()]
+        + [
+            telemetry[column].to_numpy(dtype=float)
+            for column in ["Speed", "RPM", "nGear", "Throttle", "Brake", "DRS", "X", "Y", "Z"]
+        ]
+    )
+
+
+class TestResampling(unittest.TestCase):
+    def test_resample_telemetry_matches_interp1d(self):
+        telemetry = make_telemetry()
+        expected = reference_resample(telemetry)
+        resampled = resample_telemetry(telemetry)
+        self.assertEqual(len(resampled), len(expected))
+        numpy.testing.assert_allclose(
+            resampled[RESAMPLED_CHANNELS].to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9
+        )
+        numpy.testing.assert_array_equal(resampled["Distance"], numpy.arange(len(expected)))
+
+    def test_resample_laps_matches_each_lap_resampled_alone(self):
+        laps = [make_telemetry(samples, seed) for seed, samples in enumerate([240, 90, 310])]
+        resampled, new_lengths = resample_laps([get_lap_samples(lap) for lap in laps])
+        expected = [reference_resample(lap) for lap in laps]
+        self.assertEqual(list(new_lengths), [len(lap) for lap in expected])
+        telemetry = build_telemetry_frame(resampled, new_lengths)
+        numpy.testing.assert_allclose(
+            telemetry[RESAMPLED_CHANNELS].to_numpy(),
+            pandas.concat(expected).to_numpy(),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+
+    def test_interpolate_to_distance_extrapolates_every_lap_on_its_own(self):
+        generator = numpy.random.default_rng(1)
+        lengths, new_lengths = [30, 45], [60, 20]
+        distance = numpy.concatenate([generator.permutation(length) * 3.0 for length in lengths])
+        values = generator.normal(size=(sum(lengths), 3))
+        new_distance = numpy.concatenate(
+            [numpy.linspace(-10, 100, new_lengths[0]), numpy.linspace(-5, 150, new_lengths[1])]
+        )
+        interpolated = interpolate_to_distance(distance, values, new_distance, lengths, new_lengths)
+
+        segments = numpy.cumsum([0] + lengths)
+        new_segments = numpy.cumsum([0] + new_lengths)
+        for lap in range(len(lengths)):
+            samples = slice(segments[lap], segments[lap + 1])
+            new_samples = slice(new_segments[lap], new_segments[lap + 1])
+            interp = interp1d(distance[samples], values[samples], axis=0, fill_value="extrapolate")
+            numpy.testing.assert_allclose(
+                interpolated[new_samples], interp(new_distance[new_samples]), rtol=1e-9, atol=1e-9
+            )
+
+
+class TestSectionTimes(unittest.TestCase):
+    def test_compute_section_times_of_laps_back_to_back(self):
+        # the first lap starts just before the line, so its progress wraps from 100 to 0,
+        # the second one starts on the line at twice the speed
+        first_times = numpy.arange(0, 101.5, 0.5)
+        second_times = numpy.arange(0, 50.25, 0.25)
+        progress = numpy.concatenate([(first_times + 99) % 100, second_times * 2])
+        progress[len(first_times) - 1] = 100
+        section_times = compute_section_times(
+            progress,
+            numpy.concatenate([first_times, second_times]),
+            numpy.array([len(first_times), len(second_times)]),
+            numpy.array([0, 25, 60]),
+        )
+        numpy.testing.assert_allclose(section_times, [[25, 35, 40], [12.5, 17.5, 20]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,11 @@
 import os
-import altair as alt
-from matplotlib import image, patches, animation, pyplot as plt
+import subprocess
+import multiprocessing
+import PIL.Image
+from matplotlib import image, patches, pyplot as plt
 from matplotlib.text import Annotation
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.ticker import MultipleLocator, AutoMinorLocator
 from matplotlib.offsetbox import (
     AnnotationBbox,
@@ -12,9 +16,228 @@ from matplotlib.offsetbox import (
     DrawingArea,
 )
 from getters import *
+from warehouse import *
+
+apply_style()
+
+ndimage = LazyModule("scipy.ndimage")
+
+
+class DatasetRegistry:
+    # datasets read at most once per process and handed to every aggregation as a copy, since pandas has
+    # no copy-on-write and aggregations modify the frames they are given; a projection (columns=,
+    # filters=) of a dataset that is already held is served from it rather than read again
+    def __init__(self):
+        self.datasets = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, getter, *args, columns=None, filters=None, **kwargs):
+        key = repr((getter.__name__, args, sorted(kwargs.items())))
+        if key in self.datasets:
+            self.hits += 1
+            dataset = filter_dataset(self.datasets[key], filters)
+            return (dataset if columns is None else dataset[columns]).copy()
+
+        # a full read is held under the key of the dataset itself, so later projections are served from it
+        projected_key = key if columns is None and not filters else repr((key, columns, filters))
+        if projected_key in self.datasets:
+            self.hits += 1
+        else:
+            self.misses += 1
+            projection = dict(columns=columns, filters=filters)
+            self.datasets[projected_key] = getter(
+                *args,
+                **{name: value for name, value in projection.items() if value is not None},
+                **kwargs,
+            )
+        return self.datasets[projected_key].copy()
+
+    def clear(self):
+        self.datasets.clear()
+
+
+dataset_registry = DatasetRegistry()
+
+
+class ImageCache:
+    # decoded images shared by every chart of the process, least recently used first evicted once
+    # they take up more than max_bytes; images drawn smaller than their source even at the dpi they
+    # are rendered at are served from a downscaled variant, cached per downscaling factor, so the same
+    # large PNG is neither decoded nor resampled again per chart
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.size = 0
+
+    def insert(self, key, decoded_image):
+        self.images[key] = decoded_image
+        self.size += decoded_image.nbytes
+        while self.size > self.max_bytes and len(self.images) > 1:
+            _, evicted_image = self.images.popitem(last=False)
+            self.size -= evicted_image.nbytes
+
+    def get(self, path, zoom=1, dpi=None):
+        # the image and the zoom still left to apply to it; an OffsetImage draws every source pixel
+        # as zoom * dpi / 72 pixels, so only whole source pixels that would be drawn smaller than one
+        # pixel at the highest dpi the image may be rendered at are averaged away
+        dpi = max(plt.rcParams["figure.dpi"], AGGREGATION_EXPORT_DPI) if dpi is None else dpi
+        scale = zoom * dpi / 72
+        factor = max(1, int(1 / scale)) if scale < 1 else 1
+        key = (path, factor)
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key], zoom * factor
+
+        decoded_image = self.get(path)[0] if factor > 1 else image.imread(path)
+        if factor > 1:
+            # mean over factor x factor blocks, which keeps the alpha channel smooth unlike striding
+            height = decoded_image.shape[0] // factor * factor
+            width = decoded_image.shape[1] // factor * factor
+            decoded_image = (
+                decoded_image[:height, :width]
+                .reshape(height // factor, factor, width // factor, factor, -1)
+                .mean(axis=(1, 3))
+                .astype(decoded_image.dtype)
+                .squeeze()
+            )
+        self.insert(key, decoded_image)
+        return decoded_image, zoom * factor
+
+    def preload(self, paths, zooms=[1], dpi=None):
+        for path in paths:
+            for zoom in zooms:
+                self.get(path, zoom, dpi)
+
+    def clear(self):
+        self.images.clear()
+        self.size = 0
+
+
+image_cache = ImageCache()
+
+
+def get_offset_image(path, zoom=1, dpi=None, **kwargs):
+    # an OffsetImage of a cached image, each artist getting its own OffsetImage around the shared array
+    decoded_image, zoom = image_cache.get(path, zoom, dpi)
+    return OffsetImage(decoded_image, zoom=zoom, **kwargs)
+
+
+def get_position_image_path(position):
+    return os.path.join(package_directory, "assets", "images", f"position_{position}.png")
+
+
+def preload_images(amount_positions=20):
+    # the logos and position badges at the zooms the views draw them at, decoded once before
+    # charts are rendered in forked workers
+    image_cache.preload([signature], zooms=[0.14])
+    image_cache.preload([d_logo_path], zooms=[0.3, 0.35])
+    image_cache.preload(
+        [get_position_image_path(position + 1) for position in range(amount_positions)],
+        zooms=[0.07 - 0.0017 * amount_competitors for amount_competitors in [10, 20]],
+    )
+
+
+AGGREGATION_EXPORT_DPI = 300
+
+# formats and resolutions a chart can be exported as, every one encoded from the same rendering;
+# dpi scales the rendering, which is done at the highest dpi asked for, and width resizes it
+EXPORT_PROFILES = dict(
+    full=dict(format="png"),
+    preview=dict(format="png", width=1080),
+    webp=dict(format="webp", quality=90),
+    jpeg=dict(format="jpeg", quality=90),
+)
+
+
+def get_export_targets(export):
+    # a job's export setting, either profile names or profiles by target name
+    if isinstance(export, (list, tuple)):
+        return {name: EXPORT_PROFILES[name] for name in export}
+    return {
+        name: EXPORT_PROFILES.get(name, dict()) | profile for name, profile in export.items()
+    }
+
+
+def get_render_dpi(targets):
+    return max(profile.get("dpi", AGGREGATION_EXPORT_DPI) for profile in targets.values())
+
+
+def export_figure(figure, path, targets, dpi):
+    # the figure is rendered once onto an Agg canvas, whichever backend is in use, and every
+    # target is encoded from that rendering; the full target is written to path, the others
+    # next to it with their name appended
+    canvas = FigureCanvasAgg(figure)
+    figure.set_dpi(dpi)
+    canvas.draw()
+    rendering = PIL.Image.frombuffer(
+        "RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1
+    )
+    root = os.path.splitext(path)[0]
+    failed_targets = []
+    for name, profile in targets.items():
+        scale = (
+            profile["width"] / rendering.width
+            if "width" in profile
+            else profile.get("dpi", dpi) / dpi
+        )
+        target = (
+            rendering
+            if scale == 1
+            else rendering.resize(
+                (round(rendering.width * scale), round(rendering.height * scale)),
+                PIL.Image.LANCZOS,
+            )
+        )
+        image_format = profile.get("format", "png")
+        if image_format == "jpeg":
+            target = target.convert("RGB")
+        target_path = (
+            root
+            + ("" if name == "full" else f"_{name}")
+            + dict(jpeg=".jpg").get(image_format, f".{image_format}")
+        )
+        try:
+            target.save(
+                target_path,
+                format=image_format.upper(),
+                dpi=(round(dpi * scale), round(dpi * scale)),
+                **{key: profile[key] for key in ["quality"] if key in profile},
+            )
+        except (KeyError, ValueError, OSError) as exception:  # e.g. Pillow built without the format
+            print("FAILED EXPORTING", target_path, repr(exception))
+            failed_targets.append(target_path)
+    # the remaining targets are still written, but the chart does not count as exported
+    if failed_targets:
+        raise RuntimeError("failed exporting " + ", ".join(failed_targets))
+
+# rendered template chrome by figure layout, see Aggregation.get_template_tiles
+figure_templates = dict()
+
+
+class TemplateLayer(Artist):
+    # template tiles, stored bottom row first, copied onto the canvas as they are, which
+    # figimage would resample
+    def __init__(self, tiles):
+        super().__init__()
+        self.tiles = tiles
+        self.set_zorder(3)
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        gc = renderer.new_gc()
+        for tile, x_offset, y_offset in self.tiles:
+            renderer.draw_image(gc, x_offset, y_offset, tile)
+        gc.restore()
 
 
 class Aggregation:
+    templated = True
+    export_targets = dict(full=EXPORT_PROFILES["full"])
+    # the cached season getters the aggregation reads, built by the dispatcher before rendering it
+    datasets = []
+
     def __init__(
         self,
         grouped_by,
@@ -36,6 +259,59 @@ class Aggregation:
         self.locators = locators
         if locators:
             self.major_locator, self.minor_locator = self.locators
+        self.template_chrome = []
+
+    def get_dataset(self, getter, *args, **kwargs):
+        # season datasets that are ingested round by round are read from the warehouse
+        return dataset_registry.get(get_warehouse_getter(getter), *args, **kwargs)
+
+    def add_chrome(self, chrome):
+        # chrome that is the same for every chart with as many rows is drawn from a figure template
+        if self.templated:
+            self.template_chrome.append(chrome)
+        else:
+            chrome()
+
+    def get_template_tiles(self, dpi):
+        # the template chrome rendered once into a transparent layer at the render resolution, on
+        # a fresh figure laid out by create_figure, and cut into tiles around each of its opaque
+        # regions; shared by every chart with the same layout, as (tile, x offset, y offset) in pixels
+        key = (
+            type(self).create_figure,
+            len(self.axes),
+            self.title_x_pos,
+            self.title_y_pos,
+            tuple(chrome.__name__ for chrome in self.template_chrome),
+            dpi,
+        )
+        if key not in figure_templates:
+            figure, axes, bottom_axes = self.figure, self.axes, self.bottom_axes
+            self.create_figure()
+            try:
+                self.figure.patch.set_visible(False)
+                for ax in self.figure.axes:
+                    ax.set_axis_off()
+                for chrome in self.template_chrome:
+                    chrome()
+                canvas = FigureCanvasAgg(self.figure)
+                self.figure.set_dpi(dpi)
+                canvas.draw()
+                layer = np.asarray(canvas.buffer_rgba()).copy()
+                regions, _ = ndimage.label(
+                    ndimage.binary_dilation(layer[:, :, 3] > 0, iterations=10)
+                )
+                figure_templates[key] = [
+                    (
+                        np.ascontiguousarray(layer[rows, columns][::-1]),
+                        columns.start,
+                        len(layer) - rows.stop,
+                    )
+                    for rows, columns in ndimage.find_objects(regions)
+                ]
+            finally:
+                plt.close(self.figure)
+                self.figure, self.axes, self.bottom_axes = figure, axes, bottom_axes
+        return figure_templates[key]
 
     def create_figure(self):
         self.insets = dict(
@@ -62,21 +338,13 @@ class Aggregation:
             ]
         )
 
-    def refine_figure(self):
+    def add_position_badges(self):
         amount_competitors = len(self.df)
-        for index, (competitor_name, competitor_data) in enumerate(self.df):
-            ax = self.axes[index]
-            ax.add_artist(
+        for index in range(amount_competitors):
+            self.axes[index].add_artist(
                 AnnotationBbox(
-                    OffsetImage(
-                        image.imread(
-                            os.path.join(
-                                package_directory,
-                                "assets",
-                                "images",
-                                f"position_{index + 1}.png",
-                            )
-                        ),
+                    get_offset_image(
+                        get_position_image_path(index + 1),
                         zoom=0.07 - 0.0017 * amount_competitors,
                     ),
                     xy=(self.title_x_pos, 0.5),
@@ -86,6 +354,11 @@ class Aggregation:
                 )
             )
 
+    def refine_figure(self):
+        amount_competitors = len(self.df)
+        self.add_chrome(self.add_position_badges)
+        for index, (competitor_name, competitor_data) in enumerate(self.df):
+            ax = self.axes[index]
             identifier_bar_width = 0.021 - 0.0003 * amount_competitors
             self.figure.add_artist(
                 patches.Rectangle(
@@ -223,11 +496,14 @@ class Aggregation:
         )
 
     def apply_logos(self):
+        self.add_chrome(self.add_logos)
+
+    def add_logos(self):
         alpha = 0.95
         self.figure.add_artist(
             AnnotationBbox(
-                OffsetImage(
-                    image.imread(signature),
+                get_offset_image(
+                    signature,
                     zoom=0.14,
                     alpha=alpha,
                 ),
@@ -256,8 +532,8 @@ class Aggregation:
         )
         self.figure.add_artist(
             AnnotationBbox(
-                OffsetImage(
-                    image.imread(d_logo_path),
+                get_offset_image(
+                    d_logo_path,
                     zoom=0.3,
                     alpha=D_LOGO_ALPHA,
                 ),
@@ -269,7 +545,10 @@ class Aggregation:
         )
 
     def export(self, path):
-        self.figure.savefig(path, dpi=300)
+        dpi = get_render_dpi(self.export_targets)
+        if self.template_chrome:
+            self.figure.add_artist(TemplateLayer(self.get_template_tiles(dpi)))
+        export_figure(self.figure, path, self.export_targets, dpi)
 
 
 class AnimationViewer:
@@ -279,10 +558,12 @@ class AnimationViewer:
         subtitle,
         laps,
         cap_delta=False,
+        track_geometry=None,
     ):
         self.title = title
         self.subtitle = subtitle
         self.laps = laps
+        self.track_geometry = track_geometry
 
         self.cap_delta = cap_delta
 
@@ -635,8 +916,8 @@ class AnimationViewer:
         alpha = 0.95
         self.figure.add_artist(
             AnnotationBbox(
-                OffsetImage(
-                    image.imread(signature),
+                get_offset_image(
+                    signature,
                     zoom=0.14,
                     alpha=alpha,
                 ),
@@ -671,12 +952,11 @@ class AnimationViewer:
 
         self.reference_lap_index = 0
         self.reference_lap = self.laps[self.reference_lap_index]
-        self.reference_lap.telemetry
-        self.reference_lap.telemetry["Delta"] = 0
-        self.comparison_lap.telemetry["Delta"] = (
-            self.comparison_lap.telemetry["TimeInSeconds"]
-            - self.reference_lap.telemetry["TimeInSeconds"]
-        ).interpolate()
+        self.alignment = LapAlignment(
+            self.laps, self.reference_lap_index, track_geometry=self.track_geometry
+        )
+        for lap, lap_deltas in zip(self.laps, self.alignment.get_lap_deltas()):
+            lap.telemetry["Delta"] = lap_deltas
 
         # rotate track map if its width is greater than its height
         if (
@@ -685,6 +965,64 @@ class AnimationViewer:
         ):
             rotate_track(self.reference_lap, degrees=90)
 
+        self.prepare_frame_states()
+
+    def prepare_frame_states(self):
+        # everything a frame shows, by distance, so that update only indexes into these tables;
+        # past the end of a lap its last sample is shown
+        distances = np.arange(max(len(lap.telemetry) for lap in self.laps))
+        samples = [
+            np.minimum(distances, len(lap.telemetry) - 1) for lap in self.laps
+        ]
+        reference_samples = samples[self.reference_lap_index]
+        reference_telemetry = self.reference_lap.telemetry
+
+        self.frame_states = dict(
+            X=reference_telemetry["X"].to_numpy()[reference_samples],
+            Y=reference_telemetry["Y"].to_numpy()[reference_samples],
+            Distance=reference_telemetry["Distance"].to_numpy()[reference_samples],
+            Section=np.array(
+                [
+                    section.upper().replace("T", "TURN ")
+                    for section in reference_telemetry["Section"]
+                ]
+            )[reference_samples],
+        )
+        for lap_index, lap in enumerate(self.laps):
+            for channel_name in ["Speed", "Throttle", "Delta"]:
+                values = lap.telemetry[channel_name].to_numpy()[samples[lap_index]]
+                if channel_name == "Delta":
+                    value_strings = [
+                        ""
+                        if lap_index == self.reference_lap_index
+                        else f"{round(value, 2):+}"
+                        for value in values.tolist()
+                    ]
+                else:
+                    value_strings = [str(round(value)) for value in values.tolist()]
+                self.frame_states[f"{channel_name}_{lap_index}"] = np.array(value_strings)
+
+        # the higher of the two values is marked with the difference to the other one
+        for channel_name in ["Speed", "Throttle"]:
+            diffs = np.array(
+                [
+                    round(reference_value - comparison_value)
+                    for reference_value, comparison_value in zip(
+                        self.reference_lap.telemetry[channel_name]
+                        .to_numpy()[samples[self.reference_lap_index]]
+                        .tolist(),
+                        self.comparison_lap.telemetry[channel_name]
+                        .to_numpy()[samples[1 - self.reference_lap_index]]
+                        .tolist(),
+                    )
+                ]
+            )
+            diff_strings = np.array(
+                [r"$\blacktriangle$ " + str(abs(diff)) for diff in diffs.tolist()]
+            )
+            self.frame_states[f"{channel_name}_Diff_0"] = np.where(diffs > 0, diff_strings, "")
+            self.frame_states[f"{channel_name}_Diff_1"] = np.where(diffs < 0, diff_strings, "")
+
     def plot_data(self):
         for lap in self.laps:
             lap.plot(self.plotting_axes_lookup)
@@ -726,6 +1064,16 @@ class AnimationViewer:
             zorder=1,
         )
 
+        # the path driven so far is a single line whose data is replaced every frame
+        self.track_path = self.reference_lap.telemetry[["X", "Y"]].to_numpy()
+        (self.driven_path,) = self.trackmap_axis.plot(
+            [],
+            [],
+            color=LIGHT_COLOR,
+            linewidth=4,
+            zorder=2,
+        )
+
         (self.live_track_position,) = self.trackmap_axis.plot(
             self.reference_lap.telemetry.iloc[0]["X"],
             self.reference_lap.telemetry.iloc[0]["Y"],
@@ -737,6 +1085,63 @@ class AnimationViewer:
             clip_on=False,
         )
 
+        # the text artists update sets, under the same names as the frame states they show
+        self.text_artists = dict(Section=self.position_tracker.get_children()[0])
+        for channel_name, legend in zip(self.plotting_axes_lookup, self.legends):
+            value_legends, diff_legends = (
+                legend.get_children()[0].get_children()[1].get_children()
+            )
+            for lap_index, value_legend in enumerate(value_legends.get_children()):
+                self.text_artists[f"{channel_name}_{lap_index}"] = (
+                    value_legend.get_children()[1]
+                )
+            if channel_name in ["Speed", "Throttle"]:
+                for lap_index, diff_legend in enumerate(diff_legends.get_children()):
+                    self.text_artists[f"{channel_name}_Diff_{lap_index}"] = diff_legend
+
+        self.animated_artists = [
+            self.driven_path,
+            self.live_track_position,
+            self.position_tracker,
+            *[ax.live_line for ax in self.axes],
+            *self.legends,
+        ]
+        self.background = None
+
+    def get_scrolling_artists(self):
+        # the parts of the plotting axes that move as their x limits follow the lap, the
+        # legends and titles placed beside them stay where they are
+        return [ax.patch for ax in self.plotting_axes] + sorted(
+            [
+                artist
+                for ax in self.plotting_axes
+                for artist in [ax.xaxis, ax.yaxis, *ax.spines.values(), *ax.lines]
+                if artist not in self.animated_artists
+            ],
+            key=lambda artist: artist.get_zorder(),
+        )
+
+    def cache_background(self):
+        # everything but the animated and the scrolling artists is drawn once and restored at
+        # the start of every frame
+        for artist in self.animated_artists:
+            artist.set_animated(True)
+        self.scrolling_artists = self.get_scrolling_artists()
+        for artist in self.scrolling_artists:
+            artist.set_visible(False)
+        self.figure.canvas.draw()
+        self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.scrolling_artists:
+            artist.set_visible(True)
+
+    def draw_frame(self, current_distance):
+        if self.background is None:
+            self.cache_background()
+        self.update(current_distance)
+        self.figure.canvas.restore_region(self.background)
+        for artist in self.scrolling_artists + self.animated_artists:
+            self.figure.draw_artist(artist)
+
     def show(self):
         self.current_distance = 1
         max_distance = round(self.delta_axis.get_xlim()[1])
@@ -747,117 +1152,98 @@ class AnimationViewer:
                 self.current_distance = min(max_distance, self.current_distance + 10)
             elif event.key == "left":
                 self.current_distance = max(0, self.current_distance - 10)
-            self.update(self.current_distance)
-            self.figure.canvas.draw()
+            self.draw_frame(self.current_distance)
+            self.figure.canvas.blit(self.figure.bbox)
 
         self.figure.canvas.mpl_connect("key_press_event", move)
         plt.show()
 
     def update(self, current_distance):
-        updated_artists = []
-
-        self.reference_lap.current_sample = (
-            self.reference_lap.telemetry.iloc[current_distance]
-            if len(self.reference_lap.telemetry) > current_distance
-            else self.reference_lap.telemetry.iloc[-1]
-        )
-        self.comparison_lap.current_sample = (
-            self.comparison_lap.telemetry.iloc[current_distance]
-            if len(self.comparison_lap.telemetry) > current_distance
-            else self.comparison_lap.telemetry.iloc[-1]
-        )
+        state = min(current_distance, len(self.frame_states["X"]) - 1)
 
-        self.trackmap_axis.plot(
-            self.reference_lap.telemetry.loc[
-                : self.reference_lap.current_sample.name, "X"
-            ],
-            self.reference_lap.telemetry.loc[
-                : self.reference_lap.current_sample.name, "Y"
-            ],
-            color=LIGHT_COLOR,
-            linewidth=4,
-            zorder=2,
+        driven_samples = min(current_distance, len(self.track_path) - 1) + 1
+        self.driven_path.set_data(
+            self.track_path[:driven_samples, 0],
+            self.track_path[:driven_samples, 1],
         )
         self.live_track_position.set_data(
-            self.reference_lap.current_sample["X"],
-            self.reference_lap.current_sample["Y"],
-        )
-        updated_artists.append(self.live_track_position)
-
-        self.position_tracker.get_children()[0].set_text(
-            self.reference_lap.current_sample["Section"].upper().replace("T", "TURN ")
+            [self.frame_states["X"][state]],
+            [self.frame_states["Y"][state]],
         )
         self.position_tracker.xybox = (current_distance, self.position_tracker.xy[1])
-        updated_artists.append(self.position_tracker)
 
         for ax in self.axes:
-            ax.live_line.set_xdata(self.reference_lap.current_sample["Distance"])
+            ax.live_line.set_xdata([self.frame_states["Distance"][state]] * 2)
             ax.set_xlim(
                 max(0, current_distance) - 500,
-                min(self.reference_lap.telemetry["Distance"].max(), current_distance)
-                + 500,
+                min(self.frame_states["Distance"][-1], current_distance) + 500,
             )
-            updated_artists.append(ax.live_line)
 
-        for lap_index, lap in enumerate(self.laps):
-            for (channel_name, ax), legend in zip(
-                self.plotting_axes_lookup.items(),
-                self.legends,
-            ):
-                current_value = lap.current_sample[channel_name]
-
-                value_string = dict(
-                    Speed=lambda val: str(round(val)),
-                    Throttle=lambda val: str(round(val)),
-                    Delta=lambda val: ""
-                    if lap_index == self.reference_lap_index
-                    else f"{round(val, 2):+}",
-                )[channel_name](current_value)
-                value_textarea = (
-                    legend.get_children()[0]
-                    .get_children()[1]
-                    .get_children()[0]
-                    .get_children()[lap_index]
-                    .get_children()[1]
-                )
-                value_textarea.set_text(value_string)
-
-                if lap_index == 0 and channel_name in [
-                    "Speed",
-                    "Throttle",
-                ]:
-                    ref_lap_diff_textarea = (
-                        legend.get_children()[0]
-                        .get_children()[1]
-                        .get_children()[1]
-                        .get_children()[0]
-                    )
-                    comp_lap_diff_textarea = (
-                        legend.get_children()[0]
-                        .get_children()[1]
-                        .get_children()[1]
-                        .get_children()[1]
-                    )
-                    diff = round(
-                        lap.current_sample[channel_name]
-                        - self.comparison_lap.current_sample[channel_name]
-                    )
-                    diff_text = r"$\blacktriangle$ " + str(abs(diff))
-                    if diff > 0:  # if reference lap has higher value
-                        ref_lap_diff_textarea.set_text(diff_text)
-                        comp_lap_diff_textarea.set_text("")
-                    elif diff < 0:
-                        ref_lap_diff_textarea.set_text("")
-                        comp_lap_diff_textarea.set_text(diff_text)
-                    else:
-                        ref_lap_diff_textarea.set_text("")
-                        comp_lap_diff_textarea.set_text("")
+        for name, text_artist in self.text_artists.items():
+            text_artist.set_text(self.frame_states[name][state])
 
-                updated_artists.append(legend)
+        return self.animated_artists
 
-        return updated_artists
+    def get_frame_sequence(self):
+        frame_sequence = []
+        distance = 1
+        while distance < len(self.reference_lap.telemetry):
+            frame_sequence.append(distance)
+            distance += 2 + round(
+                (1 / 30) * self.reference_lap.telemetry.iloc[distance]["Speed"]
+            )
 
-    def export(self):
+        frame_sequence += [
+            frame_sequence[-1]
+        ] * 5  # repeat last frame when lap is completed
+
+        print(len(frame_sequence), "frames")
+        # return frame_sequence[:60]
+        return frame_sequence
+
+    def open_ffmpeg(self, path, segment=False):
+        # ffmpeg reading raw RGBA frames from its stdin; segments are encoded without metadata and
+        # concatenated into the export afterwards
+        width, height = self.figure.canvas.get_width_height()
+        return subprocess.Popen(
+            [
+                plt.rcParams["animation.ffmpeg_path"],
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "rgba",
+                "-s",
+                f"{width}x{height}",
+                "-r",
+                "10",
+                "-i",
+                "-",
+                "-vcodec",
+                "libx264",
+                "-pix_fmt",
+                "yuv420p",
+                *([] if segment else ["-metadata", "artist=DrivenByData_"]),
+                path,
+            ],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def iter_frame_buffers(self, frames):
+        # each frame as a raw RGBA buffer, repeated frames only rendered once
+        for index, distance in enumerate(frames):
+            if index == 0 or distance != frames[index - 1]:
+                self.draw_frame(distance)
+            yield self.figure.canvas.buffer_rgba()
+
+    def export(self, workers=1, segments=False):
+        # with more than one worker, frames are rendered in forked processes; either in short
+        # contiguous chunks that are streamed in order into the one ffmpeg pipe, which gives the
+        # same video as rendering them here, or with segments=True in one contiguous chunk per
+        # worker that each worker encodes itself, concatenated once all of them are done
         export_name = f"""{self.title}_{self.subtitle}_{"_vs_".join([lap.info["Driver"] for lap in self.laps])}""".replace(
             " ", "_"
         )
@@ -868,35 +1254,175 @@ class AnimationViewer:
         )
         print("exporting", export_path)
 
-        def get_frame_sequence():
-            frame_sequence = []
-            distance = 1
-            while distance < len(self.reference_lap.telemetry):
-                frame_sequence.append(distance)
-                distance += 2 + round(
-                    (1 / 30) * self.reference_lap.telemetry.iloc[distance]["Speed"]
+        # frames are blitted onto an Agg canvas and piped to ffmpeg as raw RGBA, as
+        # FuncAnimation.save redraws the whole figure for every frame
+        FigureCanvasAgg(self.figure)
+        self.cache_background()
+        frame_sequence = self.get_frame_sequence()
+
+        if workers > 1 and segments:
+            self.export_segments(export_path, frame_sequence, workers)
+            return
+
+        ffmpeg = self.open_ffmpeg(export_path)
+        if workers > 1:
+            encoded = self.export_chunks(ffmpeg, frame_sequence, workers)
+        else:
+            encoded = pipe_frames_to_ffmpeg(ffmpeg, self.iter_frame_buffers(frame_sequence))
+        if not encoded:
+            print("FAILED EXPORTING", export_path)
+
+    def export_chunks(self, ffmpeg, frame_sequence, workers):
+        # every worker writes the raw frames of its chunk to a file of its own, so only file paths
+        # are passed between processes, and the files are streamed into ffmpeg in order; the chunks
+        # in flight are sized so their files stay within ANIMATION_EXPORT_MAX_BYTES, as every 4K
+        # frame is 33 MB, and whatever is left of them is removed with the directory on any error
+        global exporting_animation
+        exporting_animation = self
+        width, height = self.figure.canvas.get_width_height()
+        in_flight = workers + 2
+        chunk_bytes = ANIMATION_EXPORT_MAX_BYTES // in_flight
+        chunk_frames = max(1, min(ANIMATION_CHUNK_FRAMES, chunk_bytes // (width * height * 4)))
+        chunks = [
+            frame_sequence[index : index + chunk_frames]
+            for index in range(0, len(frame_sequence), chunk_frames)
+        ]
+        try:
+            with tempfile.TemporaryDirectory() as frames_directory, ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+
+                def iter_rendered_frames():
+                    rendering = deque()
+                    try:
+                        for index, chunk in enumerate(chunks):
+                            frames_path = os.path.join(frames_directory, f"chunk_{index}.rgba")
+                            rendering.append(executor.submit(render_animation_frames, chunk, frames_path))
+                            if len(rendering) >= in_flight:
+                                yield from read_animation_frames(rendering.popleft().result())
+                        while rendering:
+                            yield from read_animation_frames(rendering.popleft().result())
+                    finally:  # chunks not started yet are not rendered once the export has failed
+                        for future in rendering:
+                            future.cancel()
+
+                write_ffmpeg_frames(ffmpeg, iter_rendered_frames())
+        except:  # a half written video is not kept waiting for frames that never come
+            ffmpeg.kill()
+            raise
+        finally:
+            exporting_animation = None
+        # the forked workers hold a copy of ffmpeg's stdin, so it only sees the end of the frames
+        # once they have exited
+        return close_ffmpeg(ffmpeg)
+
+    def export_segments(self, export_path, frame_sequence, workers):
+        global exporting_animation
+        exporting_animation = self
+        chunks = [
+            chunk.tolist()
+            for chunk in np.array_split(frame_sequence, workers)
+            if len(chunk)
+        ]
+        try:
+            with tempfile.TemporaryDirectory() as segment_directory:
+                segment_paths = [
+                    os.path.join(segment_directory, f"segment_{index}.mp4")
+                    for index in range(len(chunks))
+                ]
+                with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("fork")
+                ) as executor:
+                    encoded = list(
+                        executor.map(encode_animation_segment, chunks, segment_paths)
+                    )
+                if not all(encoded):
+                    print("FAILED EXPORTING", export_path)
+                    return
+
+                segment_list_path = os.path.join(segment_directory, "segments.txt")
+                with open(segment_list_path, "w") as f:
+                    f.writelines(f"file '{segment_path}'\n" for segment_path in segment_paths)
+                concatenation = subprocess.run(
+                    [
+                        plt.rcParams["animation.ffmpeg_path"],
+                        "-y",
+                        "-loglevel",
+                        "error",
+                        "-f",
+                        "concat",
+                        "-safe",
+                        "0",
+                        "-i",
+                        segment_list_path,
+                        "-c",
+                        "copy",
+                        "-metadata",
+                        "artist=DrivenByData_",
+                        export_path,
+                    ]
                 )
+                if concatenation.returncode != 0:
+                    print("FAILED EXPORTING", export_path)
+        finally:
+            exporting_animation = None
 
-            frame_sequence += [
-                frame_sequence[-1]
-            ] * 5  # repeat last frame when lap is completed
 
-            print(len(frame_sequence), "frames")
-            # return frame_sequence[:60]
-            return frame_sequence
+# frames rendered per task when exporting animations in parallel, fewer when the raw frames of
+# the chunks in flight would otherwise take up more than ANIMATION_EXPORT_MAX_BYTES on disk
+ANIMATION_CHUNK_FRAMES = 16
+ANIMATION_EXPORT_MAX_BYTES = 2 * 1024 ** 3
 
-        anim = animation.FuncAnimation(
-            self.figure,
-            self.update,
-            frames=get_frame_sequence(),
-        )
-        anim.save(
-            export_path,
-            writer=animation.FFMpegWriter(
-                fps=10,
-                metadata=dict(artist="DrivenByData_"),
-            ),
-        )
+# the AnimationViewer being exported, inherited by the forked export workers
+exporting_animation = None
+
+
+def write_ffmpeg_frames(ffmpeg, buffers):
+    # when ffmpeg exits early, e.g. on an unknown codec or a full disk, the pipe breaks and
+    # ffmpeg's own error is raised instead
+    try:
+        for buffer in buffers:
+            ffmpeg.stdin.write(buffer)
+    except BrokenPipeError:
+        _, errors = ffmpeg.communicate()
+        raise RuntimeError("ffmpeg exited before all frames were written: " + errors.decode().strip())
+
+
+def close_ffmpeg(ffmpeg):
+    # waits for ffmpeg to finish encoding the frames written to it
+    _, errors = ffmpeg.communicate()
+    if ffmpeg.returncode != 0:
+        print(errors.decode().strip())
+    return ffmpeg.returncode == 0
+
+
+def pipe_frames_to_ffmpeg(ffmpeg, buffers):
+    write_ffmpeg_frames(ffmpeg, buffers)
+    return close_ffmpeg(ffmpeg)
+
+
+def render_animation_frames(frames, frames_path):
+    with open(frames_path, "wb") as f:
+        for buffer in exporting_animation.iter_frame_buffers(frames):
+            f.write(buffer)
+    return frames_path
+
+
+def read_animation_frames(frames_path, block_size=16 * 1024 ** 2):
+    # the raw frames of a rendered chunk in blocks, removing its file once read
+    with open(frames_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            yield block
+    os.remove(frames_path)
+
+
+def encode_animation_segment(frames, segment_path):
+    ffmpeg = exporting_animation.open_ffmpeg(segment_path, segment=True)
+    return pipe_frames_to_ffmpeg(ffmpeg, exporting_animation.iter_frame_buffers(frames))
+
+
+# the shortest time between two redraws of the LapViewer cursors, in milliseconds
+HOVER_FRAME_INTERVAL = 33
 
 
 class LapViewer:
@@ -905,10 +1431,12 @@ class LapViewer:
         title,
         subtitle,
         laps,
+        track_geometry=None,
     ):
         self.title = title
         self.subtitle = subtitle
         self.laps = laps
+        self.track_geometry = track_geometry
 
         self.prepare_data()
         self.create_figure()
@@ -1007,12 +1535,9 @@ class LapViewer:
 
         self.reference_lap = self.laps[0]
 
-        self.reference_lap.telemetry["Delta"] = 0
-        for comparison_lap in self.laps[1:]:
-            comparison_lap.telemetry["Delta"] = (
-                comparison_lap.telemetry["TimeInSeconds"]
-                - self.reference_lap.telemetry["TimeInSeconds"]
-            ).interpolate()
+        self.alignment = LapAlignment(self.laps, track_geometry=self.track_geometry)
+        for lap, lap_deltas in zip(self.laps, self.alignment.get_lap_deltas()):
+            lap.telemetry["Delta"] = lap_deltas
 
         # correct_distance_offset(self.laps)
 
@@ -1186,8 +1711,8 @@ class LapViewer:
     def apply_logos(self):
         self.figure.add_artist(
             AnnotationBbox(
-                OffsetImage(
-                    image.imread(d_logo_path),
+                get_offset_image(
+                    d_logo_path,
                     zoom=0.35,
                     alpha=D_LOGO_ALPHA,
                 ),
@@ -1246,20 +1771,85 @@ class LapViewer:
             ax.add_artist(legend)
             self.legends.append(legend)
 
-        def on_move(event):
-            distance = int(event.xdata)
-            for cursor, legend, channel_name in zip(
-                self.cursors, self.legends, self.plotting_axes_lookup.keys()
+        # the value each lap has at every distance, padded with nan past the end of shorter laps
+        self.hover_values = dict()
+        for channel_name in self.plotting_axes_lookup:
+            self.hover_values[channel_name] = np.full(
+                (len(self.laps), max(len(lap.telemetry) for lap in self.laps)), np.nan
+            )
+            for index, lap in enumerate(self.laps):
+                self.hover_values[channel_name][index, : len(lap.telemetry)] = lap.telemetry[
+                    channel_name
+                ].to_numpy()
+        self.hover_texts = dict(
+            (
+                channel_name,
+                [
+                    value_legend.get_children()[1]
+                    for value_legend in legend.get_children()[0].get_children()
+                ],
+            )
+            for channel_name, legend in zip(self.plotting_axes_lookup, self.legends)
+        )
+
+        # the cursors and legends are drawn over the cached figure, only redrawing the axes they
+        # are in, and at most once per HOVER_FRAME_INTERVAL however many motion events arrive
+        for artist in self.cursors + self.legends:
+            artist.set_animated(True)
+        self.background = None
+        self.hover_distance = None
+        self.drawn_hover_distance = None
+        self.hover_scheduled = False
+        hover_timer = self.figure.canvas.new_timer(interval=HOVER_FRAME_INTERVAL)
+        hover_timer.single_shot = True
+
+        def on_draw(event):
+            self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+            self.drawn_hover_distance = None
+            draw_hover()
+
+        def draw_hover():
+            if (
+                self.background is None
+                or self.hover_distance is None
+                or self.hover_distance == self.drawn_hover_distance
             ):
-                cursor.set_xdata(distance)
-                for index, lap in enumerate(self.laps):
-                    value = lap.telemetry[channel_name].loc[distance] 
-                    value_text = round(value, 2) if channel_name == "Delta" else round(value)
-                    legend.get_children()[0].get_children()[index].get_children()[
-                        1
-                    ].set_text(value_text)
-            self.figure.canvas.draw()
+                return
+            distance = min(self.hover_distance, self.hover_values["Speed"].shape[1] - 1)
+            for cursor, channel_name in zip(self.cursors, self.plotting_axes_lookup):
+                cursor.set_xdata([distance] * 2)
+                for value, text_area in zip(
+                    self.hover_values[channel_name][:, distance],
+                    self.hover_texts[channel_name],
+                ):
+                    if np.isnan(value):
+                        text_area.set_text("")
+                    else:
+                        text_area.set_text(
+                            round(value, 2) if channel_name == "Delta" else round(value)
+                        )
+
+            self.figure.canvas.restore_region(self.background)
+            for artist in self.cursors + self.legends:
+                self.figure.draw_artist(artist)
+            for ax in self.plotting_axes:
+                self.figure.canvas.blit(ax.bbox)
+            self.drawn_hover_distance = self.hover_distance
 
+        def on_move(event):
+            if event.xdata is None:
+                return
+            self.hover_distance = max(0, int(event.xdata))
+            if not self.hover_scheduled:
+                self.hover_scheduled = True
+                hover_timer.start()
+
+        def on_hover_timer():
+            self.hover_scheduled = False
+            draw_hover()
+
+        hover_timer.add_callback(on_hover_timer)
+        self.figure.canvas.mpl_connect("draw_event", on_draw)
         self.figure.canvas.mpl_connect("motion_notify_event", on_move)
         plt.show()
 
@@ -1278,235 +1868,6 @@ class LapViewer:
         self.figure.savefig(export_path)
 
 
-class PaceAnalysis:
-    def __init__(self, season, meeting, session):
-        session = get_session(season, meeting, session)
-
-        source = session.laps
-
-        source["Day"] = (
-            source["LapStartDate"]
-            .dt.day.fillna(0)
-            .apply(lambda day_of_month: {10: 1, 11: 2, 12: 3}.get(int(day_of_month), 0))
-        )
-        source["TimeOfDay"] = (
-            source["Time"]
-            .dt.total_seconds()
-            .apply(
-                lambda secs: f"{int(secs // 3600):02d}:{int(secs % 3600) // 60:02d}:{int(secs % 3600) % 60:02d}"
-            )
-        )
-        source["Time"] = source["Time"].dt.total_seconds()
-        source["LapTime"] = source["LapTime"].dt.total_seconds()
-        source["Compound"] = source["Compound"].str.capitalize()
-        # source = source[source["IsAccurate"]]
-        source["Stint"] = source.groupby("Driver")["PitOutTime"].transform(
-            lambda group: (~group.isnull()).cumsum()
-        )
-        source = (
-            source.groupby(["Driver", "Stint"])
-            .apply(lambda group: group.iloc[1:-1])
-            .reset_index(drop=True)
-        )
-        source["StintLength"] = (
-            source.groupby(["Driver", "Stint"])["LapNumber"].transform(len).fillna(1)
-        )
-        min_stint_length_for_long_run = 5
-        source = source[(source["StintLength"] - 3) > min_stint_length_for_long_run]
-        source["Label"] = source.apply(
-            lambda row: f"""{row["Driver"]} R{int(row["Stint"])} {row["Compound"]} ({int(row["StintLength"])})""",
-            axis=1,
-        )
-        source["LapNumber"] = source.groupby("Label")["LapNumber"].transform(
-            lambda group: group - group.min()
-        )
-        source = source[
-            [
-                "Day",
-                "TimeOfDay",
-                "Time",
-                "Driver",
-                "LapNumber",
-                "LapTime",
-                "ReadableLapTime",
-                "Color",
-                "Compound",
-                "TyreLife",
-                "FreshTyre",
-                "SpeedST",
-                "Stint",
-                "StintLength",
-                "Label",
-            ]
-        ]
-        # print(source[["Time", "LapNumber", "Driver", "ReadableLapTime", "Stint", "StintLength", "Label"]])
-
-        # source["CumLapTime"] = source.groupby("Driver")["LapTime"].cumsum()
-        # winner = source.loc[
-        #     source[source["LapNumber"] == source["LapNumber"].max()]["Time"].idxmin()
-        # ]["Driver"]
-        # source["RaceTime"] = (
-        #     source.groupby("LapNumber")
-        #     .apply(lambda g: g["Time"] - g[g["Driver"] == winner].iloc[0]["Time"])
-        #     .reset_index(level=0)[0]
-        # )
-        # source["ComparativeLapTime"] = (
-        #     source.groupby("LapNumber")
-        #     .apply(lambda g: g["LapTime"] - g["LapTime"].median())
-        #     .reset_index(level=0)[0]
-        # )
-
-        group_by = "Label"
-
-        # comparison_column = "RaceTime:Q"
-        # comparison_column = "SpeedST:Q"
-        comparison_column = "LapTime:Q"
-
-        color_mapping = {
-            label: get_driver_color(season, label[:3])
-            for label in source["Label"].values
-        }
-
-        nearest_lap = alt.selection(
-            type="single",
-            nearest=True,
-            on="mouseover",
-            fields=["LapNumber"],
-            empty="none",
-        )
-        driver_selection = alt.selection_multi(fields=[group_by], empty="none")
-
-        colors = alt.condition(
-            driver_selection,
-            alt.Color(
-                f"{group_by}:N",
-                scale=alt.Scale(
-                    domain=list(color_mapping.keys()),
-                    range=list(color_mapping.values()),
-                ),
-                legend=None,
-            ),
-            alt.value(LIGHT_COLOR),
-        )
-
-        line = (
-            alt.Chart(source)
-            .mark_line(interpolate="monotone")
-            .encode(
-                x=alt.X("LapNumber:Q", scale=alt.Scale(padding=0, nice=False)),
-                y=alt.Y(
-                    comparison_column,
-                    axis=alt.Axis(tickCount=15),
-                    scale={
-                        "LapTime:Q": alt.Scale(
-                            zero=False,
-                            domain=(
-                                source["LapTime"].min(),
-                                source["LapTime"].median() + 4,
-                            ),
-                            clamp=True,
-                        ),
-                        # "RaceTime:Q": alt.Scale(),
-                        # "ComparativeLapTime:Q": alt.Scale(domain=(-5, 5), clamp=True),
-                        # "SpeedST:Q": alt.Scale(
-                        #     zero=False,
-                        #     domain=(
-                        #         source["SpeedST"].median() - 20,
-                        #         source["SpeedST"].median() + 20,
-                        #     ),
-                        # ),
-                    }[comparison_column],
-                ),
-                tooltip=[
-                    "Day",
-                    "TimeOfDay",
-                    "LapNumber",
-                    "Driver",
-                    "ReadableLapTime",
-                    "Compound",
-                    "Stint",
-                    "TyreLife",
-                    "SpeedST",
-                ],
-                color=colors,
-                opacity=alt.condition(driver_selection, alt.value(1.0), alt.value(0.1)),
-            )
-        )
-
-        # Transparent selectors across the chart. This is what tells us the x-value of the cursor
-        selectors = (
-            alt.Chart(source)
-            .mark_point()
-            .encode(
-                x=alt.X("LapNumber:Q", scale=alt.Scale(padding=0)),
-                opacity=alt.value(0),
-            )
-            .add_selection(nearest_lap)
-        )
-
-        legend = (
-            alt.Chart(source)
-            .mark_point(size=100)
-            .encode(x=alt.X(f"{group_by}:N", axis=alt.Axis(title="")), color=colors)
-            .add_selection(driver_selection)
-        )
-
-        # Draw points on the line, and highlight based on selection
-        points = line.mark_point().encode(
-            opacity=alt.condition(
-                driver_selection,
-                alt.value(1),
-                alt.value(0),
-            )
-        )
-
-        # text = points.mark_text(align="left", dx=5, dy=-5).encode(
-        #     text=alt.condition(nearest_lap, "ReadableLapTime", alt.value(" ")),
-        # )
-
-        # Draw a rule at the location of the selection
-        rules = (
-            alt.Chart(source)
-            .mark_rule(color=LIGHT_COLOR)
-            .encode(
-                x="LapNumber:Q",
-            )
-            .transform_filter(nearest_lap)
-        )
-
-        # Put the five layers into a chart and bind the data
-        chart = (
-            alt.layer(
-                line,
-                selectors,
-                points,
-                rules,
-            )
-            .properties(
-                title=f"""{session.info["Season"]} {session.info["Meeting"]} - Pace Overview""",
-                width=2200,
-                height=1220,
-            )
-            .interactive()
-        )
-
-        window = (
-            alt.vconcat(
-                chart,
-                legend,
-            )
-            .configure(background=BACKGROUND_COLOR, padding=0, font="Roboto")
-            .configure_axis(gridOpacity=0.15)
-            .configure_view(strokeWidth=0)
-        )
-
-        alt.themes.enable("dark")
-        # alt.renderers.enable("mimetype")
-
-        # window.save("chart.html")
-        window.show()
-
-
 class Experimental:
     def __init__(
         self,
@@ -1727,8 +2088,8 @@ class Experimental:
         alpha = 0.95
         self.figure.add_artist(
             AnnotationBbox(
-                OffsetImage(
-                    image.imread(signature),
+                get_offset_image(
+                    signature,
                     zoom=0.14,
                     alpha=alpha,
                 ),
@@ -1754,7 +2115,7 @@ class Experimental:
 
     def prepare_data(self):
         for lap in self.laps:
-            lap.telemetry["Speed"] = savgol_filter(
+            lap.telemetry["Speed"] = signal.savgol_filter(
                 lap.telemetry["Speed"], window_length=99, polyorder=1
             )
         self.laps.sort(key=lambda lap: lap.info["SpeedST"])
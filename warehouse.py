@@ -0,0 +1,201 @@
+from getters import *
+
+# season datasets kept in the warehouse, by name: the season getter that builds them and whether
+# stand-in drivers are filtered from them, which can only be done over the whole season; only
+# getters building their dataset from the sessions of the season can be ingested a round at a
+# time, so the engine data (testing sessions only) and the pit stop times (read from a CSV) are not kept
+WAREHOUSE_DATASETS = dict(
+    Launches=(get_all_launches, True),
+    All_Gearshifts=(get_all_gearshifts, True),
+    Race_Laps_Upshifts_RPM=(get_all_upshifts, True),
+    Racing_Laps=(get_all_racing_laps, True),
+    DRS_Activations=(get_DRS_activations, True),
+    Race_Control_Messages=(get_all_race_control_messages, False),
+    Pit_Stop_Laps=(get_all_pitstop_laps, True),
+    Pit_Stops=(get_all_pitstops, True),
+    Downshift_Rates=(get_downshift_rates, True),
+    Session_Section_Times=(get_section_times, False),
+)
+
+
+def get_manifest_path(season):
+    return os.path.join(warehouse_directory, f"{season}_manifest.json")
+
+
+def get_manifest(season):
+    # dataset name -> meeting -> session -> when it was ingested
+    if not os.path.exists(get_manifest_path(season)):
+        return dict()
+    with open(get_manifest_path(season)) as f:
+        return json.load(f)
+
+
+def set_manifest(season, manifest):
+    with open(get_manifest_path(season) + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(get_manifest_path(season) + ".tmp", get_manifest_path(season))
+
+
+def get_dataset_directory(season, dataset_name):
+    return os.path.join(warehouse_directory, f"{season}_{dataset_name}")
+
+
+def get_completed_rounds(season):
+    # rounds of the schedule whose race day is over, as (round number, meeting)
+    events = get_event_schedule(season)
+    completed = events[
+        (events["RoundNumber"] > 0)
+        & (events["EventDate"] + pd.Timedelta(days=1) < pd.Timestamp.now())
+    ]
+    return list(zip(completed["RoundNumber"], completed["EventName"]))
+
+
+def write_partition(dataset, season, dataset_name, meeting):
+    # one partition per meeting, replacing whatever an earlier ingestion of the meeting wrote
+    partition_directory = os.path.join(
+        get_dataset_directory(season, dataset_name), f"Meeting={meeting}"
+    )
+    os.makedirs(partition_directory, exist_ok=True)
+    dataset = dataset.drop(columns=["Meeting"], errors="ignore").reset_index(drop=True)
+    parquet_path = os.path.join(partition_directory, "part.parquet")
+    pickle_path = os.path.join(partition_directory, "part.pkl")
+    if pyarrow is not None:
+        try:
+            dataset.to_parquet(parquet_path + ".tmp", engine="pyarrow", index=False)
+            os.replace(parquet_path + ".tmp", parquet_path)
+            if os.path.exists(pickle_path):
+                os.remove(pickle_path)
+            return
+        except:
+            print("FAILED PARQUET PARTITION WRITE, WRITING PICKLE")
+    dataset.to_pickle(pickle_path)
+    if os.path.exists(parquet_path):
+        os.remove(parquet_path)
+
+
+def ingest_season(season, dataset_names=None):
+    # runs the season getters for only the completed rounds that are not in the manifest yet,
+    # one round at a time, and appends each round as a partition of the season dataset
+    os.makedirs(warehouse_directory, exist_ok=True)
+    manifest = get_manifest(season)
+    dataset_names = list(WAREHOUSE_DATASETS) if dataset_names is None else dataset_names
+    for round_number, meeting in get_completed_rounds(season):
+        pending = [
+            dataset_name
+            for dataset_name in dataset_names
+            if meeting not in manifest.get(dataset_name, dict())
+        ]
+        if not pending:
+            continue
+        with SessionScope(season, [round_number]) as scope:
+            for dataset_name in pending:
+                print(season, meeting, dataset_name)
+                getter, _ = WAREHOUSE_DATASETS[dataset_name]
+                scope.session_requests, scope.failed_requests = [], []
+                try:
+                    dataset = getter.__wrapped__(season)
+                    if isinstance(dataset, ChunkedDataset):
+                        chunked_dataset = dataset
+                        try:
+                            dataset = chunked_dataset.to_frame()
+                        finally:
+                            chunked_dataset.close()
+                except:
+                    print("FAILED INGESTING MEETING")
+                    continue
+                if scope.failed_requests:  # retried on the next run rather than ingested incomplete
+                    print("SESSIONS NOT AVAILABLE YET", scope.failed_requests)
+                    continue
+                if "Meeting" in dataset.columns:  # anything outside the round belongs to other partitions
+                    dataset = dataset[dataset["Meeting"] == meeting]
+                if not len(dataset):  # e.g. a getter skipping sessions it failed on, retried on the next run
+                    print("NOTHING INGESTED")
+                    continue
+                write_partition(dataset, season, dataset_name, meeting)
+                ingested_at = pd.Timestamp.now().isoformat()
+                manifest.setdefault(dataset_name, dict())[meeting] = {
+                    str(session_identifier): ingested_at
+                    for _, _, session_identifier in scope.session_requests
+                }
+                set_manifest(season, manifest)
+        session_cache.clear()
+
+
+def get_warehouse_dataset(season, dataset_name, columns=None, filters=None):
+    # the season dataset as ingested so far, in calendar order, only reading the requested columns
+    # and meetings unless stand-in drivers have to be filtered over the whole season first; every
+    # partition is read on its own, as each has the schema inferred from its own meeting (a column
+    # that is all missing in one meeting and strings in another would not read as one dataset)
+    _, filters_standins = WAREHOUSE_DATASETS[dataset_name]
+    directory = get_dataset_directory(season, dataset_name)
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(
+            f"{dataset_name} of {season} has not been ingested, run ingest_season({season}) first"
+        )
+
+    read_columns, read_filters = columns, filters
+    if columns is not None:
+        needed = ["Driver"] if "Team" in columns or filters_standins else []
+        needed += ["Meeting"] if filters_standins else []
+        needed += [column for column, _, _ in filters or []]
+        read_columns = list(
+            dict.fromkeys([column for column in columns if column != "Team"] + needed)
+        )
+    if filters_standins:
+        read_filters = None
+    meeting_filters = [entry for entry in read_filters or [] if entry[0] == "Meeting"]
+
+    calendar = [round.name for round in CALENDAR.get(season, [])]
+    meetings = sorted(
+        [partition[len("Meeting="):] for partition in os.listdir(directory)],
+        key=lambda meeting: (calendar.index(meeting) if meeting in calendar else len(calendar), meeting),
+    )
+    partitions = []
+    for meeting in meetings:
+        if len(filter_dataset(pd.DataFrame(dict(Meeting=[meeting])), meeting_filters)) == 0:
+            continue
+        partition_directory = os.path.join(directory, f"Meeting={meeting}")
+        part_columns = None if read_columns is None else [
+            column for column in read_columns if column != "Meeting"
+        ]
+        if os.path.exists(os.path.join(partition_directory, "part.parquet")) and pyarrow is not None:
+            partition = pd.read_parquet(
+                os.path.join(partition_directory, "part.parquet"), engine="pyarrow", columns=part_columns
+            )
+        elif os.path.exists(os.path.join(partition_directory, "part.pkl")):
+            partition = pd.read_pickle(os.path.join(partition_directory, "part.pkl"))
+            partition = partition if part_columns is None else partition[part_columns]
+        else:
+            continue
+        partitions.append(partition.assign(Meeting=meeting))
+    if not partitions:
+        return pd.DataFrame(columns=columns)
+    dataset = filter_dataset(pd.concat(partitions, ignore_index=True), read_filters)
+    dataset = dataset if read_columns is None else dataset[read_columns]
+
+    if filters_standins:
+        dataset = filter_dataset(filter_standin_drivers(dataset), filters)
+    dataset = enrich_dataset(dataset.reset_index(drop=True), season)
+    return dataset if columns is None else dataset[columns]
+
+
+# the warehouse dataset each season getter builds, by getter name
+WAREHOUSE_GETTERS = {
+    getter.__name__: dataset_name for dataset_name, (getter, _) in WAREHOUSE_DATASETS.items()
+}
+
+
+def get_warehouse_getter(getter):
+    # the getter reading its season dataset from the warehouse once the season is being ingested
+    # there, and building it through the dataset cache as before otherwise
+    dataset_name = WAREHOUSE_GETTERS.get(getter.__name__)
+    if dataset_name is None:
+        return getter
+
+    @functools.wraps(getter)
+    def warehouse_getter(season, columns=None, filters=None, **kwargs):
+        if kwargs or dataset_name not in get_manifest(season):
+            return getter(season, columns=columns, filters=filters, **kwargs)
+        return get_warehouse_dataset(season, dataset_name, columns, filters)
+
+    return warehouse_getter